@@ -15,8 +15,7 @@ from ..deps import get_pipeline
 from ...config import settings
 from ...core import Pipeline, SourceManager
 from ...schemas.common import ApiResponse
-import base64
-import cv2
+from ...utils.frame_utils import encode_frame_to_jpeg
 import numpy as np
 import time
 
@@ -56,11 +55,7 @@ def encode_frame_to_base64(frame: np.ndarray, quality: int = 80) -> str:
     Returns:
         base64编码的JPEG图像字符串
     """
-    encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
-    _, buffer = cv2.imencode('.jpg', frame, encode_params)
-    # 转换为bytes再进行base64编码
-    buffer_bytes = np.array(buffer).tobytes()
-    return base64.b64encode(buffer_bytes).decode('utf-8')
+    return encode_frame_to_jpeg(frame, quality)
 
 
 @router.post("/upload", response_model=ApiResponse[SourceInfo])
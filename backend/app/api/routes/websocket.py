@@ -6,6 +6,7 @@ WebSocket端点
 
 import asyncio
 import json
+import struct
 from typing import Set
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
@@ -14,11 +15,15 @@ from ...schemas.websocket import (
     BinaryFrameHeader,
     WSMessage,
 )
+from ...utils.frame_utils import encode_base64
 from ...utils.logger import get_logger
 from ..deps import get_session_manager
 
 logger = get_logger(__name__)
 
+# 二进制帧消息的头部长度前缀（4 字节大端无符号整数）
+_HEADER_LENGTH = struct.Struct(">I")
+
 router = APIRouter()
 
 
@@ -75,9 +80,10 @@ class ConnectionManager:
         """
         广播二进制帧数据
 
-        传输协议：
-        1. 先发送JSON头部（包含元数据）
-        2. 紧接着发送二进制图像数据
+        传输协议（单条二进制消息）：
+        [4 字节大端头部长度][UTF-8 JSON 头部（包含元数据）][JPEG图像数据]
+
+        头部与图像合并为一条消息发送，每帧只产生一个 WebSocket 帧
 
         Args:
             header: 帧头部信息
@@ -86,15 +92,15 @@ class ConnectionManager:
         if not self._connections:
             return
 
-        header_json = header.model_dump_json()
+        header_bytes = header.model_dump_json().encode("utf-8")
+        payload = b"".join(
+            (_HEADER_LENGTH.pack(len(header_bytes)), header_bytes, image_bytes)
+        )
         disconnected = []
 
         for conn in self._connections:
             try:
-                # 先发送JSON头部
-                await conn.send_text(header_json)
-                # 再发送二进制图像数据
-                await conn.send_bytes(image_bytes)
+                await conn.send_bytes(payload)
             except Exception:
                 disconnected.append(conn)
 
@@ -137,13 +143,11 @@ async def websocket_stream(websocket: WebSocket):
             await manager.broadcast_binary_frame(header, image_bytes)
         else:
             # 降级到Base64传输
-            import base64
-
             from ...schemas.websocket import FrameMessage
             frame_msg = FrameMessage(
                 timestamp=header.timestamp,
                 frame_id=header.frame_id,
-                image=base64.b64encode(image_bytes).decode('utf-8'),
+                image=encode_base64(image_bytes),
                 detections=header.detections,
                 emotions=header.emotions
             )
@@ -49,6 +49,11 @@ class Settings(BaseSettings):
         default="auto",
         description="推理设备: auto/cuda/cpu"
     )
+    opencv_threads: int | None = Field(
+        default=None,
+        description="OpenCV 内部线程数，None 为 OpenCV 默认；"
+        "与推理线程池争用 CPU 时可设为 1"
+    )
     
     # 上传配置
     upload_dir: Path = Field(
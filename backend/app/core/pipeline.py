@@ -33,7 +33,7 @@ from ..schemas.websocket import (
     StatsMessage,
     StatusMessage,
 )
-from ..utils.frame_utils import encode_frame_bytes, encode_frame_to_jpeg
+from ..utils.frame_utils import encode_base64, encode_frame_bytes, encode_frame_to_jpeg
 from ..utils.logger import get_logger
 from .source_manager import SourceManager
 
@@ -275,6 +275,7 @@ class Pipeline:
         # 每次开始新一轮处理前重置跟踪器，避免历史情绪融合污染相同视频的重跑结果
         if self._tracker:
             self._tracker.reset()
+        self._recognizer.reset_cache()
 
         self._state = PipelineState.RUNNING
         self._frame_count = 0
@@ -418,7 +419,10 @@ class Pipeline:
                     detections, emotions, (frame.shape[0], frame.shape[1])
                 )
 
-            rendered_frame = self._renderer.render(frame, detections, emotions)
+            # 帧由生成器逐帧新建，渲染后不再使用，直接在原帧上绘制
+            rendered_frame = self._renderer.render(
+                frame, detections, emotions, inplace=True
+            )
             image_data = None  # 稍后编码
 
         # 更新统计
@@ -437,7 +441,9 @@ class Pipeline:
             if image_data is None:
                 # 同步模式下需要编码
                 image_bytes = encode_frame_bytes(
-                    rendered_frame, quality=self._config.performance.output_quality
+                    rendered_frame,
+                    quality=self._config.performance.output_quality,
+                    use_gpu=self._config.performance.gpu_jpeg,
                 )
             else:
                 # 异步模式下已经编码
@@ -463,9 +469,7 @@ class Pipeline:
                 )
             else:
                 # 异步模式下image_data是bytes，需要转换为base64
-                import base64
-
-                image_base64 = base64.b64encode(image_data).decode("utf-8")
+                image_base64 = encode_base64(image_data)
 
             # 构建消息
             frame_msg = FrameMessage(
@@ -604,9 +608,7 @@ class Pipeline:
 
         elif self._on_frame_callback:
             # Base64传输（兼容模式）
-            import base64
-
-            image_base64 = base64.b64encode(image_bytes).decode("utf-8")
+            image_base64 = encode_base64(image_bytes)
 
             frame_msg = FrameMessage(
                 timestamp=time.time(),
@@ -637,31 +639,34 @@ class Pipeline:
         if self._renderer is None:
             raise RuntimeError("渲染器未初始化")
 
-        rendered = self._renderer.render(frame, detections, emotions)
+        # 帧由生成器逐帧新建，渲染后不再使用，直接在原帧上绘制
+        rendered = self._renderer.render(frame, detections, emotions, inplace=True)
         image_bytes = encode_frame_bytes(
-            rendered, quality=self._config.performance.output_quality
+            rendered,
+            quality=self._config.performance.output_quality,
+            use_gpu=self._config.performance.gpu_jpeg,
         )
         return rendered, image_bytes
 
     def _to_detection_payload(self, detection: Detection) -> DetectionPayload:
         """转换检测结果为载荷格式"""
-        return DetectionPayload(
-            id=detection.id,
-            type=detection.type,
-            bbox=detection.bbox,
-            confidence=detection.confidence,
-            paired_id=detection.paired_id,
-        )
+        return {
+            "id": detection.id,
+            "type": detection.type,
+            "bbox": detection.bbox,
+            "confidence": detection.confidence,
+            "paired_id": detection.paired_id,
+        }
 
     def _to_emotion_payload(self, emotion: EmotionResult) -> EmotionPayload:
         """转换情绪结果为载荷格式"""
-        return EmotionPayload(
-            detection_id=emotion.detection_id,
-            probabilities=emotion.probabilities,
-            dominant_emotion=emotion.dominant_emotion,
-            confidence=emotion.confidence,
-            context_attention=emotion.context_attention,
-        )
+        return {
+            "detection_id": emotion.detection_id,
+            "probabilities": emotion.probabilities,
+            "dominant_emotion": emotion.dominant_emotion,
+            "confidence": emotion.confidence,
+            "context_attention": emotion.context_attention,
+        }
 
     async def _notify_status(self) -> None:
         """发送状态通知"""
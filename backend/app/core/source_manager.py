@@ -10,7 +10,7 @@ from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from pathlib import Path
-from typing import AsyncGenerator, Optional, Tuple, Union
+from typing import AsyncGenerator, Callable, Optional, Tuple, Union
 
 import cv2
 import numpy as np
@@ -76,8 +76,15 @@ class SourceManager:
         self._source_info: Optional[SourceInfo] = None
         self._is_running = False
         self._is_paused = False
+        # 图像源的图像，或视频源打开时读到的首帧（用于预览）；
+        # 视频/摄像头读帧时不更新，读出的帧交给流水线原地绘制
         self._current_frame: Optional[np.ndarray] = None
+        # 仅用于需要与读帧并发的会话级操作
         self._lock = asyncio.Lock()
+        # 按源类型特化的读帧函数, 在 open_* 中绑定
+        self._read_frame: Callable[[], Tuple[bool, Optional[np.ndarray]]] = (
+            self._read_frame_closed
+        )
 
         # 帧队列（用于自适应帧生成器）
         self._frame_queue: deque = deque(maxlen=2)  # 最多缓存2帧
@@ -85,6 +92,8 @@ class SourceManager:
 
         # 帧读取线程池（避免阻塞事件循环）
         self._read_executor: Optional[ThreadPoolExecutor] = None
+        # 帧读取所在的事件循环（供读取线程回调使用）
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
     @property
     def source_info(self) -> Optional[SourceInfo]:
@@ -133,6 +142,7 @@ class SourceManager:
             height=h,
             total_frames=1,
         )
+        self._read_frame = self._read_frame_image
 
         logger.info(f"已打开图像: {path} ({w}x{h})")
         return True
@@ -180,6 +190,7 @@ class SourceManager:
             fps=fps,
             total_frames=total,
         )
+        self._read_frame = self._read_frame_capture
 
         logger.info(f"已打开视频: {path} ({w}x{h}, {fps:.1f}fps, {total}帧)")
         return True
@@ -212,6 +223,7 @@ class SourceManager:
             height=h,
             fps=fps,
         )
+        self._read_frame = self._read_frame_capture
 
         logger.info(f"已打开摄像头: {camera_id} ({w}x{h}, {fps:.1f}fps)")
         return True
@@ -220,29 +232,32 @@ class SourceManager:
         """
         读取一帧
 
+        实际读取逻辑在打开视觉源时按源类型绑定, 避免每帧判断源类型
+
         Returns:
             (是否成功, 帧数据)
         """
-        if self._source_info is None:
-            return False, None
+        return self._read_frame()
 
-        if self._source_info.source_type == SourceType.IMAGE:
-            # 图像源总是返回同一帧
-            return (
-                True,
-                self._current_frame.copy() if self._current_frame is not None else None,
-            )
+    def _read_frame_closed(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """未打开视觉源时的读帧函数"""
+        return False, None
 
+    def _read_frame_image(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """图像源读帧: 总是返回同一帧"""
+        return (
+            True,
+            self._current_frame.copy() if self._current_frame is not None else None,
+        )
+
+    def _read_frame_capture(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """视频/摄像头读帧: 返回的帧归调用方所有，可直接在其上绘制"""
         if self._capture is None or not self._capture.isOpened():
             return False, None
 
         ret, frame = self._capture.read()
         if ret:
-            self._current_frame = frame
-            if self._source_info:
-                self._source_info.current_frame = int(
-                    self._capture.get(cv2.CAP_PROP_POS_FRAMES)
-                )
+            self._source_info.current_frame += 1
 
         return ret, frame
 
@@ -275,8 +290,8 @@ class SourceManager:
                     await asyncio.sleep(0.1)
                     continue
 
-                async with self._lock:
-                    ret, frame = self.read_frame()
+                # 非自适应路径中只有本生成器读取视觉源, 无需加锁
+                ret, frame = self.read_frame()
 
                 if not ret or frame is None:
                     if self._source_info.source_type == SourceType.VIDEO:
@@ -391,7 +406,8 @@ class SourceManager:
         self._read_executor = ThreadPoolExecutor(
             max_workers=1, thread_name_prefix="frame_reader"
         )
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
+        self._loop = loop
 
         # 视频文件需要按原始帧率读取
         is_video_file = (
@@ -458,6 +474,7 @@ class SourceManager:
             if self._read_executor:
                 self._read_executor.shutdown(wait=False)
                 self._read_executor = None
+            self._loop = None
 
     def pause(self) -> None:
         """暂停读取"""
@@ -534,6 +551,7 @@ class SourceManager:
     def close(self) -> None:
         """关闭视觉源"""
         self.stop()
+        self._read_frame = self._read_frame_closed
 
         # 关闭帧读取线程池
         if self._read_executor is not None:
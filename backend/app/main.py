@@ -7,6 +7,7 @@ FastAPI 应用主模块
 from contextlib import asynccontextmanager
 from pathlib import Path
 
+import cv2
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -26,6 +27,10 @@ async def lifespan(app: FastAPI):
     logger = get_logger("main")
     logger.info(f"启动 {settings.app_name} v{settings.app_version}")
     
+    if settings.opencv_threads is not None:
+        cv2.setNumThreads(settings.opencv_threads)
+        logger.info(f"OpenCV 线程数: {cv2.getNumThreads()}")
+    
     # 确保必要目录存在
     Path(settings.upload_dir).mkdir(parents=True, exist_ok=True)
     Path(settings.models_dir).mkdir(parents=True, exist_ok=True)
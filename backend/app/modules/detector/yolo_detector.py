@@ -6,19 +6,37 @@ YOLO11 目标检测器实现
 
 import time
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Type
 
+import cv2
 import numpy as np
+import torch
 
 from ...schemas.common import BoundingBox
 from ...schemas.pipeline import DetectorConfig
+from ...utils.device import select_device
 from ...utils.logger import get_logger
-from ..recognizer.matching import apply_pairing, match_faces_to_persons
+from ..recognizer.matching import match_xyxy
 from .base_detector import BaseDetector
 from .schemas import Detection, DetectionType
 
+if TYPE_CHECKING:
+    from ultralytics import YOLO
+
 logger = get_logger(__name__)
 
+_yolo_cls: Optional["Type[YOLO]"] = None
+
+
+def _get_yolo_cls() -> "Type[YOLO]":
+    """懒加载 ultralytics.YOLO，每个进程只导入一次"""
+    global _yolo_cls
+    if _yolo_cls is None:
+        from ultralytics import YOLO
+
+        _yolo_cls = YOLO
+    return _yolo_cls
+
 
 class YOLODetector(BaseDetector):
     """
@@ -28,6 +46,9 @@ class YOLODetector(BaseDetector):
     """
 
     PERSON_CLASS_ID = 0  # COCO数据集中person的类别ID
+    DEFAULT_MODEL_NAME = "yolo26m_ch.pt"  # 默认预训练模型
+    INPUT_SIZE = 640  # 模型输入边长
+    PAD_VALUE = 114  # letterbox 填充值（与 ultralytics 一致）
 
     def __init__(self, config: DetectorConfig, model_path: Optional[Path] = None):
         """
@@ -40,31 +61,138 @@ class YOLODetector(BaseDetector):
         super().__init__(config)
         self._model_path = model_path
         self._use_custom_model = model_path is not None
+        self._half = False  # CUDA 上使用 FP16 推理
+        self._device: torch.device = torch.device("cpu")
+        # CUDA 下复用的锁页输入缓冲区 (H, W, 3) uint8
+        self._pinned_input: Optional[torch.Tensor] = None
+        # 上一次从锁页缓冲区发起的异步上传完成事件
+        self._upload_done: Optional[torch.cuda.Event] = None
+        # 本实例已加载并预热的模型 {(模型名, 设备): YOLO}，切换模型尺寸后再切回时复用；
+        # 不跨实例共享：ultralytics 的 predictor 有状态，多个流水线并发调用同一实例不安全
+        self._model_cache: Dict[Tuple[str, str], "YOLO"] = {}
+
+    def _resolve_model_name(self) -> str:
+        """解析当前应加载的模型权重名称"""
+        if self._model_path and Path(self._model_path).exists():
+            return str(self._model_path)
+        return self.DEFAULT_MODEL_NAME
+
+    def _resolve_engine(self, model_name: str, device: torch.device) -> str:
+        """
+        在 CUDA 上优先使用与权重同名的 TensorRT 引擎
 
-    def load_model(self) -> None:
-        """加载YOLO26模型"""
+        引擎文件不存在且开启 use_tensorrt 时导出 FP16 动态 batch 引擎；
+        导出失败则回退到原始权重。
+
+        Args:
+            model_name: 权重文件名或路径
+            device: 推理设备
+
+        Returns:
+            实际加载的模型文件
+        """
+        if device.type != "cuda" or not model_name.endswith(".pt"):
+            return model_name
+
+        engine_path = Path(model_name).with_suffix(".engine")
+        if engine_path.exists():
+            return str(engine_path)
+        if not self._config.use_tensorrt:
+            return model_name
+
+        logger.info(f"导出TensorRT引擎: {model_name}，首次导出可能需要数分钟")
         try:
-            from ultralytics import YOLO
+            exported = _get_yolo_cls()(model_name).export(
+                format="engine",
+                imgsz=self.INPUT_SIZE,
+                device=device.index or 0,
+                dynamic=True,
+                batch=self._config.batch_size,
+                half=True,
+                verbose=False,
+            )
+        except Exception as e:
+            logger.warning(f"TensorRT引擎导出失败，使用PyTorch权重: {e}")
+            return model_name
+        return str(exported)
 
-            if self._model_path and Path(self._model_path).exists():
+    def load_model(self) -> None:
+        """加载YOLO26模型（优先复用本实例已预热的模型）"""
+        try:
+            device = select_device()
+            model_name = self._resolve_engine(self._resolve_model_name(), device)
+            self._device = device
+            self._half = device.type == "cuda"
+            if self._half:
+                self._pinned_input = torch.empty(
+                    (self.INPUT_SIZE, self.INPUT_SIZE, 3), dtype=torch.uint8
+                ).pin_memory()
+            cache_key = (model_name, str(device))
+
+            cached = self._model_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"复用已加载的YOLO模型: {model_name}")
+                self._model = cached
+                return
+
+            if model_name.endswith(".engine"):
+                logger.info(f"加载TensorRT引擎: {model_name}")
+            elif model_name != self.DEFAULT_MODEL_NAME:
                 # 使用自定义模型
-                logger.info(f"加载自定义YOLO模型: {self._model_path}")
-                self._model = YOLO(str(self._model_path))
+                logger.info(f"加载自定义YOLO模型: {model_name}")
             else:
                 # 使用预训练模型
-                model_name = "yolo26m_ch.pt"
                 logger.info(f"加载预训练YOLO模型: {model_name}")
-                self._model = YOLO(model_name)
+            self._model = _get_yolo_cls()(model_name, task="detect")
 
             # 预热模型
             dummy_input = np.zeros((640, 640, 3), dtype=np.uint8)
-            self._model.predict(dummy_input, verbose=False)
+            self._model.predict(dummy_input, half=self._half, verbose=False)
+            self._model_cache[cache_key] = self._model
             logger.info("YOLO模型加载完成并已预热")
 
         except Exception as e:
             logger.error(f"YOLO模型加载失败: {e}")
             raise
 
+    def _letterbox_to_device(
+        self, frame: np.ndarray
+    ) -> Tuple[torch.Tensor, float, Tuple[int, int]]:
+        """
+        在锁页内存中完成 letterbox，并异步上传到 GPU 归一化
+
+        Args:
+            frame: 输入图像帧 (BGR格式)
+
+        Returns:
+            (模型输入张量 (1, 3, S, S), 缩放比例, (左侧填充, 顶部填充))
+        """
+        assert self._pinned_input is not None
+        size = self.INPUT_SIZE
+        h, w = frame.shape[:2]
+        scale = min(size / h, size / w)
+        new_w, new_h = round(w * scale), round(h * scale)
+        left, top = (size - new_w) // 2, (size - new_h) // 2
+
+        # 缓冲区在帧间复用：覆写前等待上一帧的异步上传完成，避免改写在途拷贝的源数据
+        # （通常上一帧的后处理已同步过，此处不再阻塞）
+        if self._upload_done is not None:
+            self._upload_done.synchronize()
+        buffer = self._pinned_input.numpy()
+        buffer.fill(self.PAD_VALUE)
+        if (new_w, new_h) != (w, h):
+            frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        np.copyto(buffer[top : top + new_h, left : left + new_w], frame)
+
+        # HWC BGR uint8 → 1CHW RGB，归一化在设备端完成
+        tensor = self._pinned_input.to(self._device, non_blocking=True)
+        if self._upload_done is None:
+            self._upload_done = torch.cuda.Event()
+        self._upload_done.record()
+        tensor = tensor.permute(2, 0, 1).flip(0).unsqueeze(0)
+        tensor = (tensor.half() if self._half else tensor.float()).div_(255.0)
+        return tensor.contiguous(), scale, (left, top)
+
     def detect(self, frame: np.ndarray) -> List[Detection]:
         """
         执行目标检测
@@ -80,96 +208,166 @@ class YOLODetector(BaseDetector):
 
         start_time = time.perf_counter()
 
-        # 使用两个阈值中较小的作为 YOLO 推理底线，后处理中按类型过滤
-        min_conf = min(
-            self._config.face_confidence_threshold,
-            self._config.person_confidence_threshold,
-        )
+        # CUDA 下自行完成预处理，ultralytics 直接使用已归一化的张量
+        if self._pinned_input is not None:
+            source, scale, (pad_x, pad_y) = self._letterbox_to_device(frame)
+        else:
+            source, scale, (pad_x, pad_y) = frame, 1.0, (0, 0)
 
-        # 执行推理
-        results = self._model.predict(
-            frame,
-            conf=min_conf,
+        # 执行推理（stream 模式逐帧产出结果，不构造结果列表）
+        stream = self._model.predict(
+            source,
+            conf=self._inference_conf(),
             iou=self._config.iou_threshold,
             max_det=self._config.max_detections,
+            half=self._half,
             verbose=False,
+            stream=True,
+        )
+        try:
+            result = next(stream, None)
+        finally:
+            stream.close()
+
+        letterbox = None if source is frame else (scale, pad_x, pad_y)
+        faces, persons = self._build_detections(result, frame, letterbox)
+
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        # loguru 延迟格式化, 日志级别高于 DEBUG 时不产生字符串开销
+        logger.debug(
+            "检测完成: {}张人脸, {}个人体, 耗时 {:.1f}ms",
+            len(faces),
+            len(persons),
+            elapsed_ms,
         )
 
-        detections: List[Detection] = []
+        return faces + persons
+
+    def _inference_conf(self) -> float:
+        """使用两个阈值中较小的作为 YOLO 推理底线，后处理中按类型过滤"""
+        return min(
+            self._config.face_confidence_threshold,
+            self._config.person_confidence_threshold,
+        )
+
+    def _build_detections(
+        self,
+        result,
+        frame: np.ndarray,
+        letterbox: Optional[Tuple[float, int, int]] = None,
+    ) -> Tuple[List[Detection], List[Detection]]:
+        """
+        将单帧 YOLO 推理结果转换为检测列表并完成人脸-人体配对
+
+        Args:
+            result: ultralytics 单帧推理结果
+            frame: 对应的原始图像帧
+            letterbox: (缩放比例, 左侧填充, 顶部填充)，输入经自行 letterbox 时提供
+
+        Returns:
+            (人脸检测列表, 人体检测列表)
+        """
         faces: List[Detection] = []
         persons: List[Detection] = []
 
-        if results and len(results) > 0:
-            result = results[0]
+        if result is not None:
             boxes = result.boxes
 
-            if boxes is not None:
-                for box in boxes:
-                    cls_id = int(box.cls.item())
-                    conf = float(box.conf.item())
-                    xyxy = box.xyxy[0].cpu().numpy()
-
-                    bbox = BoundingBox.from_xyxy(
-                        float(xyxy[0]), float(xyxy[1]), float(xyxy[2]), float(xyxy[3])
+            if boxes is not None and len(boxes) > 0:
+                # 整个结果张量 (N, 6: xyxy, conf, cls) 只做一次设备到主机的拷贝，
+                # 避免逐框 .item() 或逐字段 .cpu() 触发多次同步
+                data = boxes.data.cpu().numpy()
+                xyxy_arr = data[:, :4]
+                conf_arr = data[:, -2]
+                cls_arr = data[:, -1].astype(np.int32)
+                if letterbox is not None:
+                    # 从 letterbox 坐标映射回原图坐标
+                    scale, pad_x, pad_y = letterbox
+                    xyxy_arr = (xyxy_arr - (pad_x, pad_y, pad_x, pad_y)) / scale
+                    xyxy_arr[:, 0::2] = xyxy_arr[:, 0::2].clip(0, frame.shape[1])
+                    xyxy_arr[:, 1::2] = xyxy_arr[:, 1::2].clip(0, frame.shape[0])
+
+                # 判断类别 (根据模型输出调整)
+                # 对于COCO预训练模型，cls_id=0 是 person
+                # 对于自定义模型，假设其他类别为face
+                is_person = cls_arr == self.PERSON_CLASS_ID
+                person_mask = is_person & (
+                    conf_arr >= self._config.person_confidence_threshold
+                )
+                face_mask = ~is_person & (
+                    conf_arr >= self._config.face_confidence_threshold
+                )
+
+                # 面积占比过滤
+                frame_area = frame.shape[0] * frame.shape[1]
+                if frame_area > 0 and self._config.min_face_area_ratio > 0:
+                    areas = (xyxy_arr[:, 2] - xyxy_arr[:, 0]) * (
+                        xyxy_arr[:, 3] - xyxy_arr[:, 1]
                     )
-
-                    # 判断类别 (根据模型输出调整)
-                    # 对于COCO预训练模型，cls_id=0 是 person
-                    # 对于自定义模型，需要根据实际类别映射调整
-                    if cls_id == self.PERSON_CLASS_ID:
-                        if (
-                            self._config.detect_person
-                            and conf >= self._config.person_confidence_threshold
-                        ):
-                            detection = Detection(
-                                id=self._next_id(),
-                                type=DetectionType.PERSON,
+                    face_mask &= areas / frame_area >= self._config.min_face_area_ratio
+
+                if not self._config.detect_person:
+                    person_mask[:] = False
+                if not self._config.detect_face:
+                    face_mask[:] = False
+
+                # 按原始顺序分配ID，并在数组上完成人脸-人体配对
+                keep = np.flatnonzero(person_mask | face_mask)
+                ids = np.zeros(len(cls_arr), dtype=np.int64)
+                for i in keep.tolist():
+                    ids[i] = self._next_id()
+
+                face_idx = keep[face_mask[keep]]
+                person_idx = keep[person_mask[keep]]
+                pairs = match_xyxy(xyxy_arr[face_idx], xyxy_arr[person_idx])
+
+                paired = np.full(len(cls_arr), -1, dtype=np.int64)
+                matched = pairs >= 0
+                paired[face_idx[matched]] = ids[person_idx[pairs[matched]]]
+                paired[person_idx[pairs[matched]]] = ids[face_idx[matched]]
+
+                # 仅在最后一步构建 pydantic 模型
+                xyxy_list = xyxy_arr.tolist()
+                conf_list = conf_arr.tolist()
+                ids_list = ids.tolist()
+                paired_list = paired.tolist()
+                for det_type, indices, target in (
+                    (DetectionType.FACE, face_idx, faces),
+                    (DetectionType.PERSON, person_idx, persons),
+                ):
+                    for i in indices.tolist():
+                        x1, y1, x2, y2 = xyxy_list[i]
+                        # 数据来自模型输出，跳过 pydantic 校验
+                        bbox = BoundingBox.model_construct(
+                            x=x1, y=y1, width=x2 - x1, height=y2 - y1
+                        )
+                        target.append(
+                            Detection(
+                                id=ids_list[i],
+                                type=det_type,
                                 bbox=bbox,
-                                confidence=conf,
+                                confidence=conf_list[i],
+                                paired_id=paired_list[i]
+                                if paired_list[i] >= 0
+                                else None,
                             )
-                            persons.append(detection)
-                    else:
-                        # 假设其他类别为face (自定义模型)
-                        if (
-                            self._config.detect_face
-                            and conf >= self._config.face_confidence_threshold
-                        ):
-                            # 面积占比过滤
-                            frame_area = frame.shape[0] * frame.shape[1]
-                            bbox_area = bbox.area
-                            area_ratio = bbox_area / frame_area if frame_area > 0 else 0.0
-                            if area_ratio < self._config.min_face_area_ratio:
-                                continue
-                            detection = Detection(
-                                id=self._next_id(),
-                                type=DetectionType.FACE,
-                                bbox=bbox,
-                                confidence=conf,
-                            )
-                            faces.append(detection)
-
-        # 配对人脸和人体
-        mapping = match_faces_to_persons(faces, persons)
-        apply_pairing(faces, persons, mapping)
-
-        # 合并结果
-        detections.extend(faces)
-        detections.extend(persons)
+                        )
 
-        elapsed_ms = (time.perf_counter() - start_time) * 1000
-        logger.debug(
-            f"检测完成: {len(faces)}张人脸, {len(persons)}个人体, "
-            f"耗时 {elapsed_ms:.1f}ms"
-        )
+        return faces, persons
 
-        return detections
+    def cleanup(self) -> None:
+        """清理资源"""
+        super().cleanup()
+        self._model_cache.clear()
+        self._pinned_input = None
+        self._upload_done = None
 
     def update_config(self, config: DetectorConfig) -> None:
         """更新检测器配置"""
         old_size = self._config.model_size
         super().update_config(config)
 
-        # 如果模型尺寸变化，需要重新加载模型
+        # 如果模型尺寸变化，需要重新加载模型（已预热的模型从缓存复用）
         if config.model_size != old_size and not self._use_custom_model:
             logger.info(f"模型尺寸变更: {old_size} -> {config.model_size}")
             self.load_model()
@@ -5,15 +5,33 @@
 """
 
 from abc import abstractmethod
-from typing import List
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
 
 import numpy as np
+import torch
+from models.weight_utils import fold_batchnorm1d
 
-from ...schemas.pipeline import RecognizerConfig
+from ...schemas.pipeline import InferenceBackend, Precision, RecognizerConfig
+from ...utils.logger import get_logger
 from ..base import BaseModule
 from ..detector.schemas import Detection
+from .preprocessing import FrameInputs
 from .schemas import EmotionResult
 
+logger = get_logger(__name__)
+
+# 推理精度对应的 autocast 数据类型（FP32 不启用 autocast）
+_AUTOCAST_DTYPES: dict[Precision, torch.dtype] = {
+    Precision.FP16: torch.float16,
+    Precision.BF16: torch.bfloat16,
+}
+
+Box = tuple[float, float, float, float]
+# _compile_backbones 替换记录: (父模块, 属性名, 原模块)
+_Replaced = tuple[torch.nn.Module, str, torch.nn.Module]
+
 
 class BaseEmotionRecognizer(BaseModule[RecognizerConfig]):
     """
@@ -22,6 +40,10 @@ class BaseEmotionRecognizer(BaseModule[RecognizerConfig]):
     用户可继承此类实现自定义的情绪识别模型接入
     """
 
+    WARMUP_ITERATIONS = 3  # 模型加载后的预热前向次数
+    # 导出 ONNX 引擎时的输入名称（按 forward 参数顺序），为空表示不支持导出
+    ENGINE_INPUT_NAMES: tuple[str, ...] = ()
+
     def __init__(self, config: RecognizerConfig):
         """
         初始化识别器
@@ -31,6 +53,10 @@ class BaseEmotionRecognizer(BaseModule[RecognizerConfig]):
         """
         super().__init__(config)
         self._model = None
+        # CUDA 下预处理与上传使用的独立流，首次使用时创建
+        self._copy_stream: Optional[torch.cuda.Stream] = None
+        # 上一帧人脸的（推理时的人脸框, 识别结果, 已复用帧数），用于跳过几乎未移动的人脸
+        self._result_cache: list[tuple[Box, EmotionResult, int]] = []
 
     @property
     def emotion_labels(self) -> List[str]:
@@ -63,6 +89,401 @@ class BaseEmotionRecognizer(BaseModule[RecognizerConfig]):
         """
         pass
 
+    def predict_prepared(
+        self, inputs: FrameInputs, detections: List[Detection]
+    ) -> List[EmotionResult]:
+        """
+        使用共享的单帧预处理结果进行情绪识别
+
+        多个识别器处理同一帧时由调用方创建 FrameInputs 并依次传入；
+        默认实现直接调用 predict，子类可覆写以复用预处理结果
+
+        Args:
+            inputs: 单帧预处理结果缓存
+            detections: 检测结果列表
+
+        Returns:
+            情绪识别结果列表
+        """
+        return self.predict(inputs.frame, detections)
+
+    def reset_cache(self) -> None:
+        """清空跨帧结果缓存（切换输入源或重新开始处理时调用）"""
+        self._result_cache = []
+
+    def _predict_with_cache(
+        self,
+        faces: List[Detection],
+        infer: Callable[[List[Detection]], List[EmotionResult]],
+    ) -> List[EmotionResult]:
+        """
+        复用上一帧中位置几乎不变的人脸的识别结果，仅对其余人脸执行推理
+
+        检测ID逐帧重新分配，因此按框坐标而非ID匹配：人脸框四条边与
+        推理时记录的框的偏移均小于 result_cache_px 时视为同一目标。
+        比较基准始终是推理时的框而非最近一帧的框，缓慢移动不会逐帧累积漂移；
+        同一结果连续复用 result_cache_max_frames 帧后强制重新推理，
+        避免静止人脸的表情变化长期得不到更新。
+        缓存只保留最近一帧的人脸，消失的目标自然失效。
+
+        Args:
+            faces: 待识别的人脸检测
+            infer: 对给定人脸执行推理的函数
+
+        Returns:
+            按 faces 顺序排列的识别结果（推理未产出结果的人脸被跳过）
+        """
+        threshold = self._config.result_cache_px
+        if threshold <= 0:
+            return infer(faces)
+        max_frames = self._config.result_cache_max_frames
+
+        candidates = [entry for entry in self._result_cache if entry[2] < max_frames]
+        cached: dict[int, tuple[Box, EmotionResult, int]] = {}
+        to_infer: List[Detection] = []
+        for face in faces:
+            key = face.bbox.to_xyxy()
+            for j, (box, result, age) in enumerate(candidates):
+                if all(abs(a - b) < threshold for a, b in zip(key, box)):
+                    reused = result.model_copy(update={"detection_id": face.id})
+                    cached[face.id] = (box, reused, age + 1)
+                    del candidates[j]
+                    break
+            else:
+                to_infer.append(face)
+
+        fresh = {r.detection_id: r for r in infer(to_infer)} if to_infer else {}
+
+        results: List[EmotionResult] = []
+        self._result_cache = []
+        for face in faces:
+            entry = cached.get(face.id)
+            if entry is None:
+                result = fresh.get(face.id)
+                if result is None:
+                    continue
+                entry = (face.bbox.to_xyxy(), result, 0)
+            results.append(entry[1])
+            self._result_cache.append(entry)
+
+        if cached:
+            logger.debug("复用缓存结果: {}/{} 张人脸", len(cached), len(faces))
+        return results
+
+    def _caption_features(
+        self, inputs: FrameInputs, ctx_batch: torch.Tensor
+    ) -> Optional[torch.Tensor]:
+        """
+        计算整帧的 CLIP caption 嵌入，同一帧内按编码器实例复用
+
+        caption 流的输入是全图上下文，对帧内所有人脸相同，只需对单张图编码一次。
+        缓存键包含编码器实例与输入精度：各识别器的编码器权重可能不同
+        （独立加载、INT8 量化或半精度），不能仅按模型名共享。
+        模型不提供 caption_encoder（如 ONNX 引擎）时返回 None，由模型自行计算。
+        需在推理上下文中调用。
+
+        Args:
+            inputs: 单帧预处理结果缓存
+            ctx_batch: 广播后的全图上下文批次 (B, 3, H, W)
+
+        Returns:
+            caption 嵌入 (1, D)，或 None
+        """
+        encoder = getattr(self._model, "caption_encoder", None)
+        if encoder is None:
+            return None
+        key = ("caption", id(encoder), ctx_batch.dtype, tuple(ctx_batch.shape[-2:]))
+        return inputs.shared(key, lambda: encoder(ctx_batch[:1]).view(1, -1))
+
+    def _load_engine(self, device: torch.device) -> bool:
+        """
+        按配置加载 ONNX/TensorRT 推理引擎替代 PyTorch 模型
+
+        Args:
+            device: 推理设备
+
+        Returns:
+            是否已加载引擎；返回 False 时调用方应构建 PyTorch 模型
+        """
+        backend = self._config.inference_backend
+        if backend == InferenceBackend.TORCH:
+            return False
+
+        engine_path = self._config.engine_path
+        if not engine_path:
+            logger.warning("未配置推理引擎文件路径 engine_path，回退到 PyTorch 后端")
+            return False
+        if not Path(engine_path).exists():
+            logger.info(f"推理引擎文件不存在: {engine_path}，将由 PyTorch 模型导出")
+            return False
+
+        try:
+            import onnxruntime  # noqa: F401
+
+            from .onnx_backend import OnnxModel
+        except ImportError:
+            logger.warning("未安装 onnxruntime，回退到 PyTorch 后端")
+            return False
+
+        self._model = OnnxModel(engine_path, device, backend)
+        return True
+
+    def _export_engine(self, device: torch.device, *dummy_inputs: torch.Tensor) -> None:
+        """
+        onnx/tensorrt 后端下引擎文件不存在时，由已加载权重的 PyTorch 模型导出并切换到引擎
+
+        在 _load_engine 返回 False、PyTorch 模型构建并加载权重之后调用；
+        导出或创建会话失败时保留 PyTorch 模型继续推理。
+
+        Args:
+            device: 推理设备
+            dummy_inputs: 与 forward 参数顺序一致的示例输入
+        """
+        backend = self._config.inference_backend
+        engine_path = self._config.engine_path
+        if (
+            backend == InferenceBackend.TORCH
+            or not engine_path
+            or Path(engine_path).exists()
+            or not self.ENGINE_INPUT_NAMES
+        ):
+            return
+
+        try:
+            import onnxruntime  # noqa: F401
+
+            from .onnx_backend import OnnxModel, export_onnx
+        except ImportError:
+            logger.warning("未安装 onnxruntime，回退到 PyTorch 后端")
+            return
+
+        path = Path(engine_path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            export_onnx(self._model, dummy_inputs, path, self.ENGINE_INPUT_NAMES)
+            self._model = OnnxModel(path, device, backend)
+        except Exception as e:
+            # 不保留不完整的导出文件，否则下次启动会直接加载它
+            path.unlink(missing_ok=True)
+            logger.warning(f"推理引擎导出失败，继续使用 PyTorch 后端: {e}")
+
+    @contextmanager
+    def _copy_scope(self, device: torch.device) -> Iterator[None]:
+        """
+        在独立 CUDA 流上执行输入预处理与上传
+
+        进入时复制流先等待计算流中已排队的工作（如共享的帧张量），
+        退出时计算流等待复制流完成，之后的前向即可安全使用这些输入。
+        复制流上分配的张量只会被复制流上的后续分配复用，而后续工作总是先等待
+        计算流，因此无需对输入张量调用 record_stream。
+        非 CUDA 设备上不做任何处理。
+
+        Args:
+            device: 推理设备
+        """
+        if device.type != "cuda":
+            yield
+            return
+
+        if self._copy_stream is None:
+            self._copy_stream = torch.cuda.Stream(device=device)
+        compute_stream = torch.cuda.current_stream(device)
+        self._copy_stream.wait_stream(compute_stream)
+        with torch.cuda.stream(self._copy_stream):
+            yield
+        compute_stream.wait_stream(self._copy_stream)
+
+    @contextmanager
+    def _inference_context(self, device: torch.device) -> Iterator[None]:
+        """
+        推理上下文：inference_mode 下运行（不记录版本计数与自动求导信息），
+        并按配置精度在 CUDA 上启用 autocast
+
+        Args:
+            device: 推理设备
+        """
+        dtype = _AUTOCAST_DTYPES.get(self._config.precision)
+        with torch.inference_mode():
+            if dtype is None or device.type != "cuda":
+                yield
+            else:
+                with torch.autocast(device_type="cuda", dtype=dtype):
+                    yield
+
+    def _frozen_children(self) -> list[_Replaced]:
+        """
+        查找模型中参数全部冻结的直接子网络（骨干网络）
+
+        包括 ModuleList 容器中的子模块（如 CaerMultiStream.models）
+
+        Returns:
+            (父模块, 属性名, 子模块) 列表
+        """
+        parents = [self._model]
+        parents += [
+            m for m in self._model.children() if isinstance(m, torch.nn.ModuleList)
+        ]
+        frozen: list[_Replaced] = []
+        for parent in parents:
+            for name, child in parent.named_children():
+                params = list(child.parameters())
+                if (
+                    isinstance(child, torch.nn.ModuleList)
+                    or not params
+                    or any(p.requires_grad for p in params)
+                ):
+                    continue
+                frozen.append((parent, name, child))
+        return frozen
+
+    def _prepare_model(self, device: torch.device) -> None:
+        """
+        按配置调整已加载 PyTorch 模型的权重布局与精度
+
+        - channels_last: 只转换 4 维权重（卷积核），cuDNN/oneDNN 据此为整个卷积链
+          选择 NHWC 实现；输入无需转换，首层卷积的输出即为 channels_last
+        - 半精度: autocast 只缓存需要梯度的权重的类型转换，冻结骨干网络的权重
+          每次前向都会重新转换，因此预先整体转换为 autocast 精度；
+          可训练的融合层保持 FP32，仍由 autocast 处理
+        - BatchNorm1d 折叠: 融合头/分类头中与 Linear 相邻的 BN 在 eval 下是固定仿射变换，
+          直接并入 Linear 的权重与偏置。torch 后端总是执行且不可逆：被折叠的 BN 替换为
+          nn.Identity，此后的模型只能用于推理，不能再微调，其 state_dict 也不再与原始
+          检查点的 BN 布局一致；需要训练或重新保存权重时应直接用 model_builders 构建模型
+        - caption 编码器 INT8: CPU 上对冻结的 CLIP 编码器做动态量化，
+          Linear 权重预先量化为 INT8，激活按批次动态量化
+
+        Args:
+            device: 推理设备
+        """
+        if not isinstance(self._model, torch.nn.Module):
+            return
+
+        folded = fold_batchnorm1d(self._model)
+        if folded:
+            logger.info(f"已将 {folded} 个 BatchNorm1d 折叠进相邻 Linear 层")
+
+        if self._config.channels_last:
+            self._model.to(memory_format=torch.channels_last)
+
+        dtype = _AUTOCAST_DTYPES.get(self._config.precision)
+        if dtype is not None and device.type == "cuda":
+            frozen = self._frozen_children()
+            for _, _, child in frozen:
+                child.to(dtype)
+            if frozen:
+                logger.info(
+                    f"冻结骨干网络已转换为 {dtype}: {[name for _, name, _ in frozen]}"
+                )
+
+        if self._config.quantize_caption and device.type == "cpu":
+            self._quantize_caption_encoder()
+
+    def _quantize_caption_encoder(self) -> None:
+        """将 caption 编码器的 Linear 层原地替换为动态 INT8 量化版本"""
+        encoder = getattr(self._model, "caption_encoder", None)
+        if encoder is None:
+            return
+        try:
+            torch.ao.quantization.quantize_dynamic(
+                encoder, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+            logger.info("caption 编码器已动态量化为 INT8")
+        except Exception as e:
+            logger.warning(f"caption 编码器量化失败，继续使用浮点模型: {e}")
+
+    def _compile_backbones(self, device: torch.device) -> list[_Replaced]:
+        """
+        按配置用 torch.compile 替换模型中参数全部冻结的直接子网络
+
+        冻结的骨干网络权重与输入尺寸固定且无需反向传播，编译收益最大；
+        融合层等可训练部分仍以 eager 方式执行。CUDA 上使用 reduce-overhead
+        模式以 CUDA Graph 消除逐层的 kernel 启动开销，其输出在同一骨干下一次
+        前向时会被覆盖，因此不得跨帧持有骨干网络的输出张量。
+        编译在首次前向时才真正发生，失败由 _warmup 回退。
+
+        Args:
+            device: 推理设备
+
+        Returns:
+            被替换的 (父模块, 属性名, 原模块) 列表
+        """
+        if not self._config.compile_backbones or not isinstance(
+            self._model, torch.nn.Module
+        ):
+            return []
+
+        mode = "reduce-overhead" if device.type == "cuda" else "default"
+        replaced = self._frozen_children()
+        for parent, name, child in replaced:
+            setattr(parent, name, torch.compile(child, mode=mode))
+
+        if replaced:
+            logger.info(
+                f"已编译骨干网络: {[name for _, name, _ in replaced]}, 模式: {mode}"
+            )
+        return replaced
+
+    def _warmup(self, *inputs: torch.Tensor) -> None:
+        """
+        使用占位输入预热模型
+
+        在加载后执行若干次前向，使 cuDNN 算法选择、显存分配等一次性开销
+        不落在首帧推理上；预热前先由 _prepare_model 调整权重布局与精度，
+        启用 compile_backbones 时编译也在此完成，
+        编译失败则还原为 eager 模块。启用 cuda_graph 时随后将模型替换为
+        CudaGraphModel 并录制 batch=1 的图（与 compile_backbones 同时启用时，
+        骨干网络已由 reduce-overhead 模式使用 CUDA Graph，不再整体录制）
+
+        Args:
+            inputs: 与 predict 中模型输入形状一致的张量（batch 维为 1）
+        """
+        device = inputs[0].device if inputs else torch.device("cpu")
+        self._prepare_model(device)
+        compiled = self._compile_backbones(device)
+        try:
+            self._run_warmup(inputs, device)
+        except Exception as e:
+            if not compiled:
+                raise
+            logger.warning(f"骨干网络编译失败，回退到 eager 模式: {e}")
+            for parent, name, module in compiled:
+                setattr(parent, name, module)
+            self._run_warmup(inputs, device)
+
+        if compiled or not self._use_cuda_graph(device):
+            return
+        from .cuda_graph import CudaGraphModel
+
+        eager_model = self._model
+        self._model = CudaGraphModel(
+            eager_model, device, _AUTOCAST_DTYPES.get(self._config.precision)
+        )
+        try:
+            # 录制 batch=1 的图
+            self._run_warmup(inputs, device)
+        except Exception as e:
+            logger.warning(f"CUDA Graph 录制失败，回退到 eager 模式: {e}")
+            self._model = eager_model
+
+    def _use_cuda_graph(self, device: torch.device) -> bool:
+        """是否按配置将整个前向录制为 CUDA Graph"""
+        if not self._config.cuda_graph:
+            return False
+        if device.type != "cuda" or not isinstance(self._model, torch.nn.Module):
+            logger.info("CUDA Graph 仅支持 CUDA 上的 torch 后端，已跳过")
+            return False
+        return True
+
+    def _run_warmup(
+        self, inputs: tuple[torch.Tensor, ...], device: torch.device
+    ) -> None:
+        """执行预热前向"""
+        with self._inference_context(device):
+            for _ in range(self.WARMUP_ITERATIONS):
+                self._model(*inputs)
+        if device.type == "cuda":
+            torch.cuda.synchronize(device)
+
     def initialize(self) -> None:
         """初始化识别器，加载模型"""
         self.load_model(self._config.model_path)
@@ -71,6 +492,7 @@ class BaseEmotionRecognizer(BaseModule[RecognizerConfig]):
     def cleanup(self) -> None:
         """清理资源"""
         self._model = None
+        self._result_cache = []
         self._initialized = False
 
     def update_labels(self, labels: List[str]) -> None:
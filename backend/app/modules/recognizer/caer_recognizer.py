@@ -17,7 +17,7 @@ from ...utils.logger import get_logger
 from ..detector.schemas import Detection, DetectionType
 from .base_recognizer import BaseEmotionRecognizer
 from .model_builders import build_caer_multistream
-from .preprocessing import batch_tensors, prepare_context, prepare_face
+from .preprocessing import FrameInputs, broadcast_tensor
 from .schemas import EmotionResult
 
 logger = get_logger(__name__)
@@ -35,17 +35,20 @@ def _remap_to_dden(prob_dict: dict[str, float]) -> dict[str, float]:
     return {label: prob_dict[label] for label in DDEN_LABELS if label in prob_dict}
 
 
-def _extract_context_attention(
-    attention_batch: dict[str, torch.Tensor] | None, index: int
-) -> dict[str, float] | None:
-    """提取单样本上下文注意力得分。"""
+def _context_attention_rows(
+    attention_batch: dict[str, torch.Tensor] | None, batch_size: int
+) -> list[dict[str, float] | None]:
+    """按样本拆分上下文注意力得分（每个键整批拷贝一次，避免逐样本 .item() 同步）。"""
     if attention_batch is None:
-        return None
+        return [None] * batch_size
 
-    return {
-        key: round(float(value[index].item()), 4)
+    columns = {
+        key: np.round(value.float().cpu().numpy().astype(np.float64), 4).tolist()
         for key, value in attention_batch.items()
     }
+    return [
+        {key: column[i] for key, column in columns.items()} for i in range(batch_size)
+    ]
 
 
 class CaerRecognizer(BaseEmotionRecognizer):
@@ -60,6 +63,7 @@ class CaerRecognizer(BaseEmotionRecognizer):
 
     CONTEXT_SIZE = (224, 224)
     FACE_SIZE = (48, 48)
+    ENGINE_INPUT_NAMES = ("context", "face")
 
     def __init__(self, config: RecognizerConfig):
         """
@@ -81,22 +85,32 @@ class CaerRecognizer(BaseEmotionRecognizer):
         """
         self._device = select_device()
 
-        self._model = build_caer_multistream()
-        self._model.to(self._device)
+        if not self._load_engine(self._device):
+            self._model = build_caer_multistream()
+            self._model.to(self._device)
 
-        if model_path:
-            from models.weight_utils import load_weights_init
+            if model_path:
+                from models.weight_utils import load_weights_init
 
-            load_stats = load_weights_init(self._model, model_path)
-            logger.info(
-                f"CAER 权重已加载: {model_path}",
-            )
-            if load_stats["missing_keys"] or load_stats["skipped_keys"]:
-                logger.warning(
-                    f"CAER 权重存在部分未匹配参数: missing={len(load_stats['missing_keys'])}, skipped={len(load_stats['skipped_keys'])}",
+                load_stats = load_weights_init(self._model, model_path)
+                logger.info(
+                    f"CAER 权重已加载: {model_path}",
                 )
-
-        self._model.eval()
+                if load_stats["missing_keys"] or load_stats["skipped_keys"]:
+                    logger.warning(
+                        f"CAER 权重存在部分未匹配参数: missing={len(load_stats['missing_keys'])}, skipped={len(load_stats['skipped_keys'])}",
+                    )
+
+            self._model.eval()
+            self._export_engine(
+                self._device,
+                torch.zeros(2, 3, *self.CONTEXT_SIZE, device=self._device),
+                torch.zeros(2, 3, *self.FACE_SIZE, device=self._device),
+            )
+        self._warmup(
+            torch.zeros(1, 3, *self.CONTEXT_SIZE, device=self._device),
+            torch.zeros(1, 3, *self.FACE_SIZE, device=self._device),
+        )
         logger.info(f"CAER 识别器初始化完成，设备: {self._device}")
 
     def predict(
@@ -117,6 +131,12 @@ class CaerRecognizer(BaseEmotionRecognizer):
         Returns:
             情绪识别结果列表
         """
+        return self.predict_prepared(FrameInputs(frame, self._device), detections)
+
+    def predict_prepared(
+        self, inputs: FrameInputs, detections: List[Detection]
+    ) -> List[EmotionResult]:
+        """使用共享的单帧预处理结果进行情绪识别"""
         if self._model is None:
             raise RuntimeError("模型未加载，请先调用 initialize()")
 
@@ -124,52 +144,65 @@ class CaerRecognizer(BaseEmotionRecognizer):
         if not face_detections:
             return []
 
-        # 预处理：全图对所有人脸共享
-        context_tensor = prepare_context(frame, self.CONTEXT_SIZE)
-        context_batch = [context_tensor] * len(face_detections)
-
-        face_tensors = [
-            prepare_face(frame, det.bbox, self.FACE_SIZE) for det in face_detections
-        ]
+        return self._predict_with_cache(
+            face_detections, lambda faces: self._infer_faces(inputs, faces)
+        )
 
-        ctx_batch = batch_tensors(context_batch, self._device)
-        face_batch = batch_tensors(face_tensors, self._device)
+    def _infer_faces(
+        self, inputs: FrameInputs, face_detections: List[Detection]
+    ) -> List[EmotionResult]:
+        """对给定人脸执行预处理与推理"""
+        # 预处理：全图对所有人脸共享（CUDA 下在独立流上完成）
+        with self._copy_scope(self._device):
+            ctx_batch = broadcast_tensor(
+                inputs.context(self.CONTEXT_SIZE), len(face_detections), self._device
+            )
+            face_batch = inputs.faces(
+                [det.bbox for det in face_detections], self.FACE_SIZE
+            )
 
         if ctx_batch is None or face_batch is None:
             return []
 
         # 推理
         start = time.perf_counter()
-        with torch.no_grad():
-            logits, context_attention_batch = self._model(ctx_batch, face_batch)
-            probs = torch.softmax(logits, dim=1)
+        with self._inference_context(self._device):
+            caption = self._caption_features(inputs, ctx_batch)
+            if caption is None:
+                logits, context_attention_batch = self._model(ctx_batch, face_batch)
+            else:
+                logits, context_attention_batch = self._model(
+                    ctx_batch, face_batch, caption_features=caption
+                )
+            probs = torch.softmax(logits.float(), dim=1)
 
         elapsed_ms = (time.perf_counter() - start) * 1000
         logger.debug(
-            f"CAER 推理完成: {len(face_detections)} 张人脸, {elapsed_ms:.1f}ms"
+            "CAER 推理完成: {} 张人脸, {:.1f}ms", len(face_detections), elapsed_ms
         )
 
         # 构建结果
-        probs_np = probs.cpu().numpy()
+        # 整批向量化取整与取最大值（float64 保证取整后与 Python round 一致）
+        rounded = np.round(probs.cpu().numpy().astype(np.float64), 4)
+        dominant_idx = rounded.argmax(axis=1).tolist()
+        rounded_list = rounded.tolist()
+        attention_rows = _context_attention_rows(
+            context_attention_batch, len(face_detections)
+        )
         results: List[EmotionResult] = []
 
         for i, det in enumerate(face_detections):
-            prob_dict = {
-                label: round(float(probs_np[i, j]), 4)
-                for j, label in enumerate(self._labels)
-            }
+            prob_dict = dict(zip(self._labels, rounded_list[i]))
+            dominant = self._labels[dominant_idx[i]]
             # 重排到 DDEN 标准顺序
             # prob_dict = _remap_to_dden(prob_dict)
-            dominant = max(prob_dict, key=prob_dict.get)  # type: ignore[arg-type]
             results.append(
                 EmotionResult(
                     detection_id=det.id,
                     probabilities=prob_dict,
                     dominant_emotion=dominant,
-                    confidence=prob_dict[dominant],
-                    context_attention=_extract_context_attention(
-                        context_attention_batch, i
-                    ),
+                    confidence=rounded_list[i][dominant_idx[i]],
+                    context_attention=attention_rows[i],
                 )
             )
 
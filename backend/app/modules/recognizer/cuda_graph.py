@@ -0,0 +1,163 @@
+"""
+CUDA Graph 推理封装
+
+将整个冻结模型的前向录制为 CUDA Graph，之后每次推理只需拷贝输入并重放，
+消除逐层 kernel 启动的 CPU 开销。封装后的调用方式与 PyTorch 模块一致，
+识别器可直接替换 self._model。
+"""
+
+from contextlib import nullcontext
+from typing import Any, Optional
+
+import torch
+
+from ...utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _padded_batch(batch_size: int) -> int:
+    """批次大小向上取整到 2 的幂，限制需要录制的图数量"""
+    return 1 << (batch_size - 1).bit_length()
+
+
+def _slice_outputs(output: Any, batch_size: int, padded: int) -> Any:
+    """按实际批次大小截取输出并复制出静态缓冲区（下次重放会覆盖）"""
+    if isinstance(output, torch.Tensor):
+        if output.dim() > 0 and output.shape[0] == padded:
+            output = output[:batch_size]
+        return output.clone()
+    if isinstance(output, tuple):
+        return tuple(_slice_outputs(o, batch_size, padded) for o in output)
+    if isinstance(output, dict):
+        return {k: _slice_outputs(v, batch_size, padded) for k, v in output.items()}
+    return output
+
+
+class _CapturedGraph:
+    """单一输入形状下录制的图及其静态输入输出"""
+
+    def __init__(
+        self,
+        graph: torch.cuda.CUDAGraph,
+        static_args: list[torch.Tensor],
+        static_kwargs: dict[str, torch.Tensor],
+        static_output: Any,
+    ):
+        self.graph = graph
+        self.static_args = static_args
+        self.static_kwargs = static_kwargs
+        self.static_output = static_output
+
+
+class CudaGraphModel:
+    """
+    CUDA Graph 推理模型
+
+    位置参数为批次输入 (B, ...)，批次大小补齐到 2 的幂后按输入形状分别录制；
+    关键字参数（如 caption_features）按原形状录制，不参与补齐。
+    补齐部分保留上一次的输入，逐样本独立的推理（eval 模式）不受影响，结果截取前 B 个。
+    所有图共享同一显存池。
+    """
+
+    WARMUP_ITERATIONS = 3  # 录制前在旁路流上的预热次数
+
+    def __init__(
+        self,
+        module: torch.nn.Module,
+        device: torch.device,
+        autocast_dtype: Optional[torch.dtype] = None,
+    ):
+        """
+        Args:
+            module: 已加载权重并处于 eval 模式的模型
+            device: CUDA 推理设备
+            autocast_dtype: 录制时使用的 autocast 精度，None 表示 FP32
+        """
+        self._module = module
+        self._device = device
+        self._autocast_dtype = autocast_dtype
+        self._graphs: dict[tuple, _CapturedGraph] = {}
+        self._pool = None
+
+    def __getattr__(self, name: str) -> Any:
+        """其余属性（如 caption_encoder）转发给原模型"""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._module, name)
+
+    def eval(self) -> "CudaGraphModel":
+        """与 nn.Module 接口保持一致"""
+        return self
+
+    def __call__(self, *args: torch.Tensor, **kwargs: torch.Tensor) -> Any:
+        """
+        执行推理，首次遇到新的输入形状时录制
+
+        Args:
+            args: 批次输入张量
+            kwargs: 非批次输入张量
+
+        Returns:
+            与原模型相同结构的输出
+        """
+        batch_size = args[0].shape[0]
+        padded = _padded_batch(batch_size)
+        key = (
+            tuple((padded, *a.shape[1:], a.dtype) for a in args),
+            tuple((k, *v.shape, v.dtype) for k, v in sorted(kwargs.items())),
+        )
+
+        captured = self._graphs.get(key)
+        if captured is None:
+            captured = self._capture(args, kwargs, padded)
+            self._graphs[key] = captured
+
+        for static, arg in zip(captured.static_args, args):
+            static[:batch_size].copy_(arg)
+        for name, value in kwargs.items():
+            captured.static_kwargs[name].copy_(value)
+        captured.graph.replay()
+        return _slice_outputs(captured.static_output, batch_size, padded)
+
+    def _capture(
+        self,
+        args: tuple[torch.Tensor, ...],
+        kwargs: dict[str, torch.Tensor],
+        padded: int,
+    ) -> _CapturedGraph:
+        """在旁路流上预热后录制一张图"""
+        static_args = [
+            torch.zeros((padded, *a.shape[1:]), dtype=a.dtype, device=self._device)
+            for a in args
+        ]
+        for static, arg in zip(static_args, args):
+            static[: arg.shape[0]].copy_(arg)
+        static_kwargs = {name: value.clone() for name, value in kwargs.items()}
+
+        # 录制时关闭 autocast 的权重转换缓存，否则图会引用退出 autocast 后释放的缓存
+        autocast = (
+            torch.autocast(
+                device_type="cuda", dtype=self._autocast_dtype, cache_enabled=False
+            )
+            if self._autocast_dtype is not None
+            else nullcontext()
+        )
+
+        side_stream = torch.cuda.Stream(device=self._device)
+        side_stream.wait_stream(torch.cuda.current_stream(self._device))
+        with torch.cuda.stream(side_stream), autocast:
+            for _ in range(self.WARMUP_ITERATIONS):
+                self._module(*static_args, **static_kwargs)
+        torch.cuda.current_stream(self._device).wait_stream(side_stream)
+
+        graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(graph, pool=self._pool), autocast:
+            static_output = self._module(*static_args, **static_kwargs)
+        if self._pool is None:
+            self._pool = graph.pool()
+
+        logger.info(
+            f"CUDA Graph 已录制: batch={padded}, 输入={[tuple(a.shape) for a in static_args]}"
+        )
+        return _CapturedGraph(graph, static_args, static_kwargs, static_output)
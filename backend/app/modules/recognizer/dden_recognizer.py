@@ -17,7 +17,7 @@ from ...utils.logger import get_logger
 from ..detector.schemas import Detection, DetectionType
 from .base_recognizer import BaseEmotionRecognizer
 from .model_builders import build_sddenfpn
-from .preprocessing import batch_tensors, prepare_face
+from .preprocessing import FrameInputs
 from .schemas import EmotionResult
 
 logger = get_logger(__name__)
@@ -36,6 +36,7 @@ class DDENRecognizer(BaseEmotionRecognizer):
 
     # 人脸输入尺寸
     FACE_SIZE = (224, 224)
+    ENGINE_INPUT_NAMES = ("face",)
 
     def __init__(self, config: RecognizerConfig):
         """
@@ -57,25 +58,30 @@ class DDENRecognizer(BaseEmotionRecognizer):
         """
         self._device = select_device()
 
-        # 构建模型
-        self._model = build_sddenfpn()
-        self._model.to(self._device)
+        if not self._load_engine(self._device):
+            # 构建模型
+            self._model = build_sddenfpn()
+            self._model.to(self._device)
 
-        # 加载权重
-        if model_path:
-            from models.weight_utils import load_weights_init, weights_frozen
+            # 加载权重
+            if model_path:
+                from models.weight_utils import load_weights_init, weights_frozen
 
-            load_stats = load_weights_init(self._model, model_path)
-            weights_frozen(self._model)
-            logger.info(
-                f"SDDENFPN 权重已加载: {model_path}",
-            )
-            if load_stats["missing_keys"] or load_stats["skipped_keys"]:
-                logger.warning(
-                    f"SDDENFPN 权重存在部分未匹配参数: missing={len(load_stats['missing_keys'])}, skipped={len(load_stats['skipped_keys'])}",
+                load_stats = load_weights_init(self._model, model_path)
+                weights_frozen(self._model)
+                logger.info(
+                    f"SDDENFPN 权重已加载: {model_path}",
                 )
-
-        self._model.eval()
+                if load_stats["missing_keys"] or load_stats["skipped_keys"]:
+                    logger.warning(
+                        f"SDDENFPN 权重存在部分未匹配参数: missing={len(load_stats['missing_keys'])}, skipped={len(load_stats['skipped_keys'])}",
+                    )
+
+            self._model.eval()
+            self._export_engine(
+                self._device, torch.zeros(2, 3, *self.FACE_SIZE, device=self._device)
+            )
+        self._warmup(torch.zeros(1, 3, *self.FACE_SIZE, device=self._device))
         logger.info(f"SDDENFPN 识别器初始化完成，设备: {self._device}")
 
     def predict(
@@ -95,6 +101,12 @@ class DDENRecognizer(BaseEmotionRecognizer):
         Returns:
             情绪识别结果列表（每个人脸一个结果）
         """
+        return self.predict_prepared(FrameInputs(frame, self._device), detections)
+
+    def predict_prepared(
+        self, inputs: FrameInputs, detections: List[Detection]
+    ) -> List[EmotionResult]:
+        """使用共享的单帧预处理结果进行情绪识别"""
         if self._model is None:
             raise RuntimeError("模型未加载，请先调用 initialize()")
 
@@ -103,41 +115,50 @@ class DDENRecognizer(BaseEmotionRecognizer):
         if not face_detections:
             return []
 
-        # 批量预处理人脸
-        face_tensors = [
-            prepare_face(frame, det.bbox, self.FACE_SIZE) for det in face_detections
-        ]
-        batch = batch_tensors(face_tensors, self._device)
+        return self._predict_with_cache(
+            face_detections, lambda faces: self._infer_faces(inputs, faces)
+        )
+
+    def _infer_faces(
+        self, inputs: FrameInputs, face_detections: List[Detection]
+    ) -> List[EmotionResult]:
+        """对给定人脸执行预处理与推理"""
+        # 批量预处理人脸（CUDA 下在独立流上完成）
+        with self._copy_scope(self._device):
+            batch = inputs.faces([det.bbox for det in face_detections], self.FACE_SIZE)
         if batch is None:
             return []
 
         # 推理
         start = time.perf_counter()
-        with torch.no_grad():
+        with self._inference_context(self._device):
             logits = self._model(batch)  # (B, 7)
-            probs = torch.softmax(logits, dim=1)  # (B, 7)
+            if isinstance(logits, tuple):
+                # ONNX 引擎总是返回 (logits, None)
+                logits = logits[0]
+            probs = torch.softmax(logits.float(), dim=1)  # (B, 7)
 
         elapsed_ms = (time.perf_counter() - start) * 1000
         logger.debug(
-            f"DDEN 推理完成: {len(face_detections)} 张人脸, {elapsed_ms:.1f}ms"
+            "DDEN 推理完成: {} 张人脸, {:.1f}ms", len(face_detections), elapsed_ms
         )
 
         # 构建结果
-        probs_np = probs.cpu().numpy()
+        # 整批向量化取整与取最大值（float64 保证取整后与 Python round 一致）
+        rounded = np.round(probs.cpu().numpy().astype(np.float64), 4)
+        dominant_idx = rounded.argmax(axis=1).tolist()
+        rounded_list = rounded.tolist()
         results: List[EmotionResult] = []
 
         for i, det in enumerate(face_detections):
-            prob_dict = {
-                label: round(float(probs_np[i, j]), 4)
-                for j, label in enumerate(self._labels)
-            }
-            dominant = max(prob_dict, key=prob_dict.get)  # type: ignore[arg-type]
+            prob_dict = dict(zip(self._labels, rounded_list[i]))
+            dominant = self._labels[dominant_idx[i]]
             results.append(
                 EmotionResult(
                     detection_id=det.id,
                     probabilities=prob_dict,
                     dominant_emotion=dominant,
-                    confidence=prob_dict[dominant],
+                    confidence=rounded_list[i][dominant_idx[i]],
                 )
             )
 
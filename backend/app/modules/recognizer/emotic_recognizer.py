@@ -13,11 +13,11 @@ import torch
 from ...schemas.pipeline import RecognizerConfig
 from ...utils.device import select_device
 from ...utils.logger import get_logger
-from ..detector.schemas import Detection, DetectionType
+from ..detector.schemas import Detection
 from .base_recognizer import BaseEmotionRecognizer
-from .matching import filter_by_type, get_detection_by_id, match_faces_to_persons
+from .matching import match_faces_to_persons, split_detections
 from .model_builders import build_emotic_quadruple_stream
-from .preprocessing import batch_tensors, prepare_body, prepare_context, prepare_face
+from .preprocessing import FrameInputs, broadcast_tensor
 from .schemas import EmotionResult
 
 logger = get_logger(__name__)
@@ -91,27 +91,56 @@ _EMOTIC_TO_DDEN: dict[str, str] = {
 }
 
 
-def _map_emotic_to_dden(emotic_probs: dict[str, float]) -> dict[str, float]:
-    """将 Emotic 26类概率映射到 DDEN 7类"""
-    dden_complement: dict[str, float] = {label: 0.0 for label in DDEN_LABELS}
-    for emotic_label, prob in emotic_probs.items():
+def _build_emotic_to_dden_matrix(labels: List[str]) -> np.ndarray:
+    """
+    构建 Emotic 类别 → DDEN 7类的求和矩阵
+
+    Args:
+        labels: 模型输出的 Emotic 类别，按输出列顺序排列
+
+    Returns:
+        (len(labels), 7) 矩阵，行顺序与 labels 一致
+    """
+    matrix = np.zeros((len(labels), len(DDEN_LABELS)))
+    for i, emotic_label in enumerate(labels):
         dden_label = _EMOTIC_TO_DDEN.get(emotic_label)
         if dden_label is not None:
-            dden_complement[dden_label] += prob
-    return {label: round(dden_complement[label], 4) for label in DDEN_LABELS}
+            matrix[i, DDEN_LABELS.index(dden_label)] = 1.0
+    return matrix
 
 
-def _extract_context_attention(
-    attention_batch: dict[str, torch.Tensor] | None, index: int
-) -> dict[str, float] | None:
-    """提取单样本上下文注意力得分。"""
+def _map_emotic_to_dden(emotic_probs: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """
+    将 Emotic 26类概率整批映射到 DDEN 7类并归一化
+
+    Args:
+        emotic_probs: (B, 26) 概率，列顺序与识别器的类别列表一致
+        matrix: _build_emotic_to_dden_matrix 按同一类别列表构建的求和矩阵
+
+    Returns:
+        (B, 7) 概率，列顺序与 DDEN_LABELS 一致；映射后全零的行为均匀分布
+    """
+    mapped = np.round(emotic_probs @ matrix, 4)
+    sums = mapped.sum(axis=1, keepdims=True)
+    normalized = np.full_like(mapped, 1.0 / len(DDEN_LABELS))
+    np.divide(mapped, sums, out=normalized, where=sums > 0)
+    return normalized
+
+
+def _context_attention_rows(
+    attention_batch: dict[str, torch.Tensor] | None, batch_size: int
+) -> list[dict[str, float] | None]:
+    """按样本拆分上下文注意力得分（每个键整批拷贝一次，避免逐样本 .item() 同步）。"""
     if attention_batch is None:
-        return None
+        return [None] * batch_size
 
-    return {
-        key: round(float(value[index].item()), 4)
+    columns = {
+        key: np.round(value.float().cpu().numpy().astype(np.float64), 4).tolist()
         for key, value in attention_batch.items()
     }
+    return [
+        {key: column[i] for key, column in columns.items()} for i in range(batch_size)
+    ]
 
 
 class EmoticRecognizer(BaseEmotionRecognizer):
@@ -129,6 +158,7 @@ class EmoticRecognizer(BaseEmotionRecognizer):
     CONTEXT_SIZE = (224, 224)
     BODY_SIZE = (224, 224)
     FACE_SIZE = (48, 48)
+    ENGINE_INPUT_NAMES = ("context", "body", "face")
 
     def __init__(self, config: RecognizerConfig):
         """
@@ -140,6 +170,8 @@ class EmoticRecognizer(BaseEmotionRecognizer):
         super().__init__(config)
         self._device: torch.device = torch.device("cpu")
         self._labels = EMOTIC_LABELS
+        # 按模型输出列顺序构建的 26类 → DDEN 7类 求和矩阵
+        self._to_dden = _build_emotic_to_dden_matrix(self._labels)
 
     def load_model(self, model_path: str | None = None) -> None:
         """
@@ -150,22 +182,34 @@ class EmoticRecognizer(BaseEmotionRecognizer):
         """
         self._device = select_device()
 
-        self._model = build_emotic_quadruple_stream()
-        self._model.to(self._device)
+        if not self._load_engine(self._device):
+            self._model = build_emotic_quadruple_stream()
+            self._model.to(self._device)
 
-        if model_path:
-            from models.weight_utils import load_weights_init
+            if model_path:
+                from models.weight_utils import load_weights_init
 
-            load_stats = load_weights_init(self._model, model_path)
-            logger.info(
-                f"Emotic 权重已加载: {model_path}",
-            )
-            if load_stats["missing_keys"] or load_stats["skipped_keys"]:
-                logger.warning(
-                    f"Emotic 权重存在部分未匹配参数: missing={len(load_stats['missing_keys'])}, skipped={len(load_stats['skipped_keys'])}"
+                load_stats = load_weights_init(self._model, model_path)
+                logger.info(
+                    f"Emotic 权重已加载: {model_path}",
                 )
-
-        self._model.eval()
+                if load_stats["missing_keys"] or load_stats["skipped_keys"]:
+                    logger.warning(
+                        f"Emotic 权重存在部分未匹配参数: missing={len(load_stats['missing_keys'])}, skipped={len(load_stats['skipped_keys'])}"
+                    )
+
+            self._model.eval()
+            self._export_engine(
+                self._device,
+                torch.zeros(2, 3, *self.CONTEXT_SIZE, device=self._device),
+                torch.zeros(2, 3, *self.BODY_SIZE, device=self._device),
+                torch.zeros(2, 3, *self.FACE_SIZE, device=self._device),
+            )
+        self._warmup(
+            torch.zeros(1, 3, *self.CONTEXT_SIZE, device=self._device),
+            torch.zeros(1, 3, *self.BODY_SIZE, device=self._device),
+            torch.zeros(1, 3, *self.FACE_SIZE, device=self._device),
+        )
         logger.info(f"Emotic 识别器初始化完成，设备: {self._device}")
         self.flag = 0
 
@@ -191,11 +235,16 @@ class EmoticRecognizer(BaseEmotionRecognizer):
         Returns:
             情绪识别结果列表
         """
+        return self.predict_prepared(FrameInputs(frame, self._device), detections)
+
+    def predict_prepared(
+        self, inputs: FrameInputs, detections: List[Detection]
+    ) -> List[EmotionResult]:
+        """使用共享的单帧预处理结果进行情绪识别"""
         if self._model is None:
             raise RuntimeError("模型未加载，请先调用 initialize()")
 
-        faces = filter_by_type(detections, DetectionType.FACE)
-        persons = filter_by_type(detections, DetectionType.PERSON)
+        faces, persons, by_id = split_detections(detections)
 
         if not faces:
             return []
@@ -210,9 +259,9 @@ class EmoticRecognizer(BaseEmotionRecognizer):
         for face in faces:
             person_id = mapping.get(face.id)
             if person_id is None:
-                logger.debug(f"Emotic: 人脸 {face.id} 未匹配到人体，跳过")
+                logger.debug("Emotic: 人脸 {} 未匹配到人体，跳过", face.id)
                 continue
-            person = get_detection_by_id(detections, person_id)
+            person = by_id.get(person_id)
             if person is None:
                 continue
             matched_faces.append(face)
@@ -222,35 +271,53 @@ class EmoticRecognizer(BaseEmotionRecognizer):
             logger.debug("Emotic: 无匹配的人脸-人体对，跳过推理")
             return []
 
-        # 预处理
-        context_tensor = prepare_context(frame, self.CONTEXT_SIZE)
-        context_batch = [context_tensor] * len(matched_faces)
-
-        body_tensors = [
-            prepare_body(frame, p.bbox, self.BODY_SIZE) for p in matched_persons
-        ]
-        face_tensors = [
-            prepare_face(frame, f.bbox, self.FACE_SIZE) for f in matched_faces
-        ]
+        person_by_face = {
+            face.id: person for face, person in zip(matched_faces, matched_persons)
+        }
+        return self._predict_with_cache(
+            matched_faces,
+            lambda faces: self._infer_pairs(
+                inputs, faces, [person_by_face[face.id] for face in faces]
+            ),
+        )
 
-        ctx_batch = batch_tensors(context_batch, self._device)
-        body_batch = batch_tensors(body_tensors, self._device)
-        face_batch = batch_tensors(face_tensors, self._device)
+    def _infer_pairs(
+        self,
+        inputs: FrameInputs,
+        matched_faces: List[Detection],
+        matched_persons: List[Detection],
+    ) -> List[EmotionResult]:
+        """对给定的人脸-人体对执行预处理与推理"""
+        # 预处理：全图对所有目标共享（CUDA 下在独立流上完成）
+        with self._copy_scope(self._device):
+            ctx_batch = broadcast_tensor(
+                inputs.context(self.CONTEXT_SIZE), len(matched_faces), self._device
+            )
+            body_batch = inputs.bodies(
+                [p.bbox for p in matched_persons], self.BODY_SIZE
+            )
+            face_batch = inputs.faces([f.bbox for f in matched_faces], self.FACE_SIZE)
 
         if ctx_batch is None or body_batch is None or face_batch is None:
             return []
 
         # 推理
         start = time.perf_counter()
-        with torch.no_grad():
-            logits, context_attention_batch = self._model(
-                ctx_batch, body_batch, face_batch
-            )
-            probs = torch.sigmoid(logits)
+        with self._inference_context(self._device):
+            caption = self._caption_features(inputs, ctx_batch)
+            if caption is None:
+                logits, context_attention_batch = self._model(
+                    ctx_batch, body_batch, face_batch
+                )
+            else:
+                logits, context_attention_batch = self._model(
+                    ctx_batch, body_batch, face_batch, caption_features=caption
+                )
+            probs = torch.sigmoid(logits.float())
 
         elapsed_ms = (time.perf_counter() - start) * 1000
         logger.debug(
-            f"Emotic 推理完成: {len(matched_faces)} 个目标, {elapsed_ms:.1f}ms"
+            "Emotic 推理完成: {} 个目标, {:.1f}ms", len(matched_faces), elapsed_ms
         )
 
         # 构建结果
@@ -259,45 +326,35 @@ class EmoticRecognizer(BaseEmotionRecognizer):
 
         if self.flag == 0 and probs_np.shape[0] > 1:
             self.flag += 1
-            logger.info(f"Emotic 模型输出维度: {probs_np.shape}")
-            logger.info(f"{probs_np}")
+            logger.info("Emotic 模型输出维度: {}", probs_np.shape)
+            logger.info("{}", probs_np)
 
 
+        # 原始 26 类 sigmoid 概率整批取整后映射到 DDEN 7 类
+        rounded = np.round(probs_np.astype(np.float64), 4)
+        dden_probs = _map_emotic_to_dden(rounded, self._to_dden)
+        dominant_idx = dden_probs.argmax(axis=1).tolist()
+        dden_list = dden_probs.tolist()
+        attention_rows = _context_attention_rows(
+            context_attention_batch, len(matched_faces)
+        )
+
         for i, face in enumerate(matched_faces):
-            # 原始 26 类 sigmoid 概率
-            # prob_norm = np.exp(probs_np[i]) / np.sum(np.exp(probs_np[i]))
-            # prob_norm = probs_np[i] / np.sum(probs_np[i])
-            prob_norm = probs_np[i]
-            emotic_probs = {
-                label: round(float(prob_norm[j]), 4)
-                for j, label in enumerate(self._labels)
-            }
-            # 映射到 DDEN 7 类
-            prob_dict = _map_emotic_to_dden(emotic_probs)
-            prob_sum = sum(prob_dict.values())
-            if prob_sum > 0:
-                for label, prob in prob_dict.items():
-                    prob_dict[label] = prob / prob_sum
-            else:
-                if self.flag == 1:
-                    logger.info(f"概率异常 (id: {i}): {prob_dict.values()}")
-                uniform_prob = 1.0 / len(DDEN_LABELS)
-                for label in prob_dict:
-                    prob_dict[label] = uniform_prob
-            dominant = max(prob_dict, key=prob_dict.get)  # type: ignore[arg-type]
+            prob_dict = dict(zip(DDEN_LABELS, dden_list[i]))
+            if self.flag == 1 and not rounded[i].any():
+                logger.info("概率异常 (id: {}): 26 类概率全为零", i)
+            dominant = DDEN_LABELS[dominant_idx[i]]
             results.append(
                 EmotionResult(
                     detection_id=face.id,
                     probabilities=prob_dict,
                     dominant_emotion=dominant,
-                    confidence=prob_dict[dominant],
-                    context_attention=_extract_context_attention(
-                        context_attention_batch, i
-                    ),
+                    confidence=dden_list[i][dominant_idx[i]],
+                    context_attention=attention_rows[i],
                 )
             )
             if self.flag == 1:
-                logger.info(f"Emotic 映射到 DDEN 7 类(id: {i}): {prob_dict}")
+                logger.info("Emotic 映射到 DDEN 7 类(id: {}): {}", i, prob_dict)
         if self.flag == 1 and probs_np.shape[0] > 1:
             self.flag += 1
 
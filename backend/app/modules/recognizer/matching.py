@@ -6,8 +6,15 @@
 
 from typing import Optional
 
+import numpy as np
+
 from ..detector.schemas import Detection, DetectionType
 
+# 人脸数 × 人体数不超过该值时使用纯 Python 匹配，避免 NumPy 调用的固定开销
+SMALL_MATCH_SIZE = 64
+
+Box = tuple[float, float, float, float]
+
 
 def filter_by_type(
     detections: list[Detection],
@@ -46,6 +53,214 @@ def get_detection_by_id(
     return None
 
 
+def split_detections(
+    detections: list[Detection],
+) -> tuple[list[Detection], list[Detection], dict[int, Detection]]:
+    """
+    单次遍历拆分人脸/人体检测并建立 ID 索引
+
+    Args:
+        detections: 检测结果列表
+
+    Returns:
+        (人脸列表, 人体列表, {检测ID: 检测对象})
+    """
+    faces: list[Detection] = []
+    persons: list[Detection] = []
+    by_id: dict[int, Detection] = {}
+    for d in detections:
+        by_id[d.id] = d
+        if d.type == DetectionType.FACE:
+            faces.append(d)
+        elif d.type == DetectionType.PERSON:
+            persons.append(d)
+    return faces, persons, by_id
+
+
+def _to_xyxy(detections: list[Detection]) -> np.ndarray:
+    """
+    将检测结果的边界框堆叠为 xyxy 数组
+
+    Args:
+        detections: 检测结果列表
+
+    Returns:
+        (N, 4) float32 数组
+    """
+    return np.array(
+        [(d.bbox.x, d.bbox.y, d.bbox.x2, d.bbox.y2) for d in detections],
+        dtype=np.float32,
+    ).reshape(-1, 4)
+
+
+def _pairwise_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    批量计算两组边界框的 IoU 矩阵
+
+    Args:
+        boxes_a: (N, 4) xyxy 数组
+        boxes_b: (M, 4) xyxy 数组
+
+    Returns:
+        (N, M) IoU 矩阵
+    """
+    tl = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    br = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    wh = np.clip(br - tl, 0, None)
+    inter = wh[..., 0] * wh[..., 1]
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def _centers_inside(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    判断 boxes_a 各中心点是否落在 boxes_b 各框内
+
+    Args:
+        boxes_a: (N, 4) xyxy 数组
+        boxes_b: (M, 4) xyxy 数组
+
+    Returns:
+        (N, M) 布尔矩阵
+    """
+    cx = ((boxes_a[:, 0] + boxes_a[:, 2]) / 2)[:, None]
+    cy = ((boxes_a[:, 1] + boxes_a[:, 3]) / 2)[:, None]
+    return (
+        (boxes_b[None, :, 0] <= cx)
+        & (cx <= boxes_b[None, :, 2])
+        & (boxes_b[None, :, 1] <= cy)
+        & (cy <= boxes_b[None, :, 3])
+    )
+
+
+def _match_tuples(
+    faces: list[Box],
+    persons: list[Box],
+    iou_threshold: float,
+) -> list[int]:
+    """
+    小规模输入的贪心匹配（与 match_xyxy 语义一致）
+
+    人脸中心与人体坐标预先取到局部元组中，内层循环不访问对象属性。
+
+    Args:
+        faces: 人脸 xyxy 元组列表
+        persons: 人体 xyxy 元组列表
+        iou_threshold: 最低 IoU 阈值（无包含关系时的回退条件）
+
+    Returns:
+        每个人脸匹配到的人体下标，未匹配为 -1
+    """
+    if len(faces) == 1 and len(persons) == 1:
+        # 单人画面（摄像头最常见的情形）：人脸中心在人体框内即可直接配对，
+        # 不必计算 IoU；否则交给下面的通用逻辑判断 IoU 回退条件
+        (fx1, fy1, fx2, fy2), (px1, py1, px2, py2) = faces[0], persons[0]
+        if px1 <= (fx1 + fx2) / 2 <= px2 and py1 <= (fy1 + fy2) / 2 <= py2:
+            return [0]
+
+    persons_area = [(px2 - px1) * (py2 - py1) for px1, py1, px2, py2 in persons]
+    available = [True] * len(persons)
+    result: list[int] = []
+
+    for fx1, fy1, fx2, fy2 in faces:
+        face_cx = (fx1 + fx2) / 2
+        face_cy = (fy1 + fy2) / 2
+        face_area = (fx2 - fx1) * (fy2 - fy1)
+        best_iou = 0.0
+        best = -1
+
+        for j, (px1, py1, px2, py2) in enumerate(persons):
+            if not available[j]:
+                continue
+
+            in_person = px1 <= face_cx <= px2 and py1 <= face_cy <= py2
+            if not in_person and best >= 0:
+                # 已有候选时，不包含人脸中心的人体不会替换它
+                continue
+
+            inter_w = min(fx2, px2) - max(fx1, px1)
+            inter_h = min(fy2, py2) - max(fy1, py1)
+            if inter_w <= 0 or inter_h <= 0:
+                iou = 0.0
+            else:
+                inter = inter_w * inter_h
+                union = face_area + persons_area[j] - inter
+                iou = inter / union if union > 0 else 0.0
+
+            if in_person and (best < 0 or iou > best_iou):
+                best_iou = iou
+                best = j
+            elif not in_person and best < 0 and iou > iou_threshold:
+                best_iou = iou
+                best = j
+
+        if best >= 0:
+            available[best] = False
+        result.append(best)
+
+    return result
+
+
+def match_xyxy(
+    faces_xyxy: np.ndarray,
+    persons_xyxy: np.ndarray,
+    iou_threshold: float = 0.1,
+) -> np.ndarray:
+    """
+    基于 xyxy 数组的贪心人脸-人体匹配
+
+    匹配策略与 match_faces_to_persons 一致，IoU 与包含关系一次性批量计算。
+
+    Args:
+        faces_xyxy: (F, 4) 人脸框数组
+        persons_xyxy: (P, 4) 人体框数组
+        iou_threshold: 最低 IoU 阈值（无包含关系时的回退条件）
+
+    Returns:
+        (F,) 数组，每个人脸匹配到的人体行号，未匹配为 -1
+    """
+    num_faces, num_persons = len(faces_xyxy), len(persons_xyxy)
+    result = np.full(num_faces, -1, dtype=np.intp)
+    if num_faces == 0 or num_persons == 0:
+        return result
+
+    if num_faces * num_persons <= SMALL_MATCH_SIZE:
+        result[:] = _match_tuples(
+            faces_xyxy.tolist(), persons_xyxy.tolist(), iou_threshold
+        )
+        return result
+
+    iou = _pairwise_iou(faces_xyxy, persons_xyxy)
+    inside = _centers_inside(faces_xyxy, persons_xyxy)
+    available = np.ones(num_persons, dtype=bool)
+
+    for i in range(num_faces):
+        row_iou = iou[i]
+        cand_in = inside[i] & available
+        cand_out = ~inside[i] & available & (row_iou > iou_threshold)
+
+        # 第一个满足 IoU 阈值的非包含候选（仅在其位于所有包含候选之前时有效）
+        first_out = int(np.argmax(cand_out)) if cand_out.any() else -1
+
+        if cand_in.any():
+            best = int(np.argmax(np.where(cand_in, row_iou, -np.inf)))
+            first_in = int(np.argmax(cand_in))
+            if 0 <= first_out < first_in and row_iou[best] <= row_iou[first_out]:
+                best = first_out
+        else:
+            best = first_out
+
+        if best >= 0:
+            result[i] = best
+            available[best] = False
+
+    return result
+
+
 def match_faces_to_persons(
     faces: list[Detection],
     persons: list[Detection],
@@ -71,38 +286,20 @@ def match_faces_to_persons(
     if not faces or not persons:
         return {}
 
-    mapping: dict[int, int] = {}
-    used_persons: set[int] = set()
-
-    for face in faces:
-        best_iou = 0.0
-        best_person: Optional[Detection] = None
-
-        for person in persons:
-            if person.id in used_persons:
-                continue
-
-            iou = face.bbox.iou(person.bbox)
-
-            # 检查人脸中心是否在人体框内
-            face_cx, face_cy = face.bbox.center
-            in_person = (
-                person.bbox.x <= face_cx <= person.bbox.x2
-                and person.bbox.y <= face_cy <= person.bbox.y2
-            )
-
-            if in_person and (best_person is None or iou > best_iou):
-                best_iou = iou
-                best_person = person
-            elif not in_person and best_person is None and iou > iou_threshold:
-                best_iou = iou
-                best_person = person
-
-        if best_person is not None:
-            mapping[face.id] = best_person.id
-            used_persons.add(best_person.id)
+    if len(faces) * len(persons) <= SMALL_MATCH_SIZE:
+        face_rows = _match_tuples(
+            [(f.bbox.x, f.bbox.y, f.bbox.x2, f.bbox.y2) for f in faces],
+            [(p.bbox.x, p.bbox.y, p.bbox.x2, p.bbox.y2) for p in persons],
+            iou_threshold,
+        )
+    else:
+        face_rows = match_xyxy(
+            _to_xyxy(faces), _to_xyxy(persons), iou_threshold=iou_threshold
+        ).tolist()
 
-    return mapping
+    return {
+        face.id: persons[row].id for face, row in zip(faces, face_rows) if row >= 0
+    }
 
 
 def apply_pairing(
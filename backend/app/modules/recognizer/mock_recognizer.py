@@ -4,7 +4,6 @@
 用于开发和测试，生成随机的情绪识别结果
 """
 
-import random
 import time
 from typing import List
 
@@ -34,8 +33,9 @@ class MockEmotionRecognizer(BaseEmotionRecognizer):
             config: 识别器配置
         """
         super().__init__(config)
-        self._simulate_delay = True  # 模拟推理延迟
-        self._delay_ms = 10  # 模拟延迟毫秒数
+        self._simulate_delay = True  # 模拟推理延迟（压测流水线本身时可关闭）
+        self._delay_ms = 10  # 模拟延迟毫秒数，每次 predict 只休眠一次
+        self._rng = np.random.default_rng()
 
     def load_model(self, model_path: str = None) -> None:
         """模拟加载模型"""
@@ -65,50 +65,46 @@ class MockEmotionRecognizer(BaseEmotionRecognizer):
         if self._simulate_delay:
             time.sleep(self._delay_ms / 1000)
 
-        results: List[EmotionResult] = []
         labels = self.emotion_labels
 
         # 只对face类型的检测生成情绪结果
         face_detections = [d for d in detections if d.type == DetectionType.FACE]
 
-        for detection in face_detections:
-            # 生成随机概率分布
-            probs = self._generate_random_probabilities(labels)
-
-            # 找出主导情绪
-            dominant = max(probs, key=probs.get)
-            confidence = probs[dominant]
+        # 整批生成随机概率分布并找出主导情绪
+        probs = self._generate_random_probabilities(len(face_detections), len(labels))
+        dominant_idx = probs.argmax(axis=1).tolist()
+        probs_list = probs.tolist()
 
+        results: List[EmotionResult] = []
+        for detection, row, idx in zip(face_detections, probs_list, dominant_idx):
             result = EmotionResult(
                 detection_id=detection.id,
-                probabilities=probs,
-                dominant_emotion=dominant,
-                confidence=confidence,
+                probabilities=dict(zip(labels, row)),
+                dominant_emotion=labels[idx],
+                confidence=row[idx],
             )
             results.append(result)
 
-        logger.debug(f"模拟识别完成: {len(results)} 个结果")
+        logger.debug("模拟识别完成: {} 个结果", len(results))
         return results
 
-    def _generate_random_probabilities(self, labels: List[str]) -> dict[str, float]:
+    def _generate_random_probabilities(
+        self, num_samples: int, num_labels: int
+    ) -> np.ndarray:
         """
-        生成随机概率分布
+        批量生成随机概率分布
 
         Args:
-            labels: 情绪类别列表
+            num_samples: 样本数
+            num_labels: 情绪类别数
 
         Returns:
-            概率分布字典
+            (num_samples, num_labels) 概率矩阵，每行归一化并保留 4 位小数
         """
-        # 生成随机权重并归一化
-        weights = [random.random() ** 2 for _ in labels]  # 使用平方使分布更集中
-        total = sum(weights)
-
-        probs = {
-            label: round(weight / total, 4) for label, weight in zip(labels, weights)
-        }
-
-        return probs
+        # 生成随机权重并归一化，使用平方使分布更集中
+        weights = self._rng.random((num_samples, num_labels)) ** 2
+        weights /= weights.sum(axis=1, keepdims=True)
+        return np.round(weights, 4)
 
     def set_simulate_delay(self, enabled: bool, delay_ms: int = 10) -> None:
         """
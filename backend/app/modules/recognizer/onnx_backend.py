@@ -0,0 +1,221 @@
+"""
+ONNX Runtime 推理后端
+
+将导出的 ONNX 模型包装成与 PyTorch 模块一致的调用方式，识别器可直接替换 self._model。
+TensorRT 通过 ONNX Runtime 的 TensorrtExecutionProvider 接入（FP16）。
+"""
+
+from pathlib import Path
+from typing import Sequence, Union
+
+import numpy as np
+import torch
+
+from ...schemas.pipeline import InferenceBackend
+from ...utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 注意力字典导出为额外输出时的名称前缀，避免与输入名冲突
+ATTENTION_PREFIX = "attention."
+
+OnnxOutput = tuple[torch.Tensor, dict[str, torch.Tensor] | None]
+
+# ONNX 输出元素类型到 torch 数据类型（用于在显存中预分配输出）
+_ORT_DTYPES = {
+    "tensor(float)": torch.float32,
+    "tensor(float16)": torch.float16,
+}
+
+
+def _providers(backend: InferenceBackend, device: torch.device) -> list:
+    """按后端与设备选择 ONNX Runtime 执行提供者（按优先级排列）"""
+    providers: list = ["CPUExecutionProvider"]
+    if device.type == "cuda":
+        device_id = device.index or 0
+        providers.insert(0, ("CUDAExecutionProvider", {"device_id": device_id}))
+        if backend == InferenceBackend.TENSORRT:
+            providers.insert(
+                0,
+                (
+                    "TensorrtExecutionProvider",
+                    {"device_id": device_id, "trt_fp16_enable": True},
+                ),
+            )
+    return providers
+
+
+class OnnxModel:
+    """
+    ONNX Runtime 推理模型
+
+    输入输出均为 torch.Tensor；总是返回 (logits, {输出名: 张量})，
+    与识别器模型返回的 (logits, context_attention) 结构一致，
+    没有注意力输出时与 PyTorch 模型一样返回 None。
+    """
+
+    def __init__(
+        self,
+        engine_path: Union[str, Path],
+        device: torch.device,
+        backend: InferenceBackend = InferenceBackend.ONNX,
+    ):
+        """
+        创建推理会话
+
+        Args:
+            engine_path: ONNX 模型文件路径
+            device: 推理设备
+            backend: 推理后端（ONNX 或 TENSORRT）
+        """
+        import onnxruntime as ort
+
+        available = set(ort.get_available_providers())
+        providers = [
+            p
+            for p in _providers(backend, device)
+            if (p[0] if isinstance(p, tuple) else p) in available
+        ]
+        self._session = ort.InferenceSession(str(engine_path), providers=providers)
+        self._device = device
+        self._input_names = [i.name for i in self._session.get_inputs()]
+        outputs = self._session.get_outputs()
+        self._output_names = [o.name for o in outputs]
+        self._attention_names = [
+            name.removeprefix(ATTENTION_PREFIX) for name in self._output_names[1:]
+        ]
+        # 除首维 batch 外形状固定时，输出可预分配在显存中直接绑定
+        self._output_specs = [
+            (tuple(o.shape[1:]), _ORT_DTYPES.get(o.type)) for o in outputs
+        ]
+        self._static_outputs = all(
+            dtype is not None and all(isinstance(d, int) for d in shape)
+            for shape, dtype in self._output_specs
+        )
+        # 会话实际在 GPU 上运行时，输入直接从显存绑定，避免回拷主机
+        self._bind_cuda = device.type == "cuda" and self._session.get_providers()[
+            0
+        ] in ("CUDAExecutionProvider", "TensorrtExecutionProvider")
+
+        logger.info(
+            f"ONNX 推理会话已创建: {engine_path}, 提供者: {self._session.get_providers()}"
+        )
+
+    def eval(self) -> "OnnxModel":
+        """与 nn.Module 接口保持一致"""
+        return self
+
+    def __call__(self, *inputs: torch.Tensor) -> OnnxOutput:
+        """
+        执行推理
+
+        Args:
+            inputs: 按导出时顺序排列的输入张量
+
+        Returns:
+            (首个输出, {其余输出名: 张量})，单输出时为 (首个输出, None)
+        """
+        if self._bind_cuda:
+            tensors = self._run_cuda(inputs)
+        else:
+            feeds = {
+                name: t.detach().cpu().numpy()
+                for name, t in zip(self._input_names, inputs)
+            }
+            outputs = self._session.run(self._output_names, feeds)
+            tensors = [torch.from_numpy(o).to(self._device) for o in outputs]
+
+        if not self._attention_names:
+            return tensors[0], None
+        return tensors[0], dict(zip(self._attention_names, tensors[1:]))
+
+    def _run_cuda(self, inputs: Sequence[torch.Tensor]) -> list[torch.Tensor]:
+        """
+        通过 IOBinding 直接使用显存中的输入张量
+
+        输出形状除 batch 外固定时预分配在显存中绑定，结果不经主机中转；
+        否则由 ONNX Runtime 分配并拷回主机后再上传
+        """
+        binding = self._session.io_binding()
+        # 保持连续张量的引用直到推理结束
+        contiguous = [t.detach().float().contiguous() for t in inputs]
+        for name, t in zip(self._input_names, contiguous):
+            binding.bind_input(
+                name,
+                device_type="cuda",
+                device_id=t.device.index or 0,
+                element_type=np.float32,
+                shape=tuple(t.shape),
+                buffer_ptr=t.data_ptr(),
+            )
+
+        if not self._static_outputs:
+            for name in self._output_names:
+                binding.bind_output(name)
+            self._session.run_with_iobinding(binding)
+            return [
+                torch.from_numpy(o).to(self._device)
+                for o in binding.copy_outputs_to_cpu()
+            ]
+
+        batch_size = contiguous[0].shape[0]
+        outputs = [
+            torch.empty((batch_size, *shape), dtype=dtype, device=self._device)
+            for shape, dtype in self._output_specs
+        ]
+        for name, t in zip(self._output_names, outputs):
+            binding.bind_output(
+                name,
+                device_type="cuda",
+                device_id=t.device.index or 0,
+                element_type=np.float16 if t.dtype == torch.float16 else np.float32,
+                shape=tuple(t.shape),
+                buffer_ptr=t.data_ptr(),
+            )
+        # ONNX Runtime 在自己的 CUDA 流上执行：先等待 torch 流上的输入与输出分配就绪
+        torch.cuda.current_stream(self._device).synchronize()
+        self._session.run_with_iobinding(binding)
+        binding.synchronize_outputs()
+        return outputs
+
+
+def export_onnx(
+    model: torch.nn.Module,
+    dummy_inputs: tuple[torch.Tensor, ...],
+    output_path: Union[str, Path],
+    input_names: Sequence[str],
+    opset_version: int = 18,
+) -> None:
+    """
+    将识别器模型导出为 batch 维动态的 ONNX 文件
+
+    模型若返回 (logits, {名称: 张量})，字典中的各项以 ATTENTION_PREFIX 加键名导出为额外输出，
+    OnnxModel 推理时会还原为同样的结构。
+
+    Args:
+        model: 已加载权重的 PyTorch 模型
+        dummy_inputs: 与 forward 参数顺序一致的示例输入
+        output_path: 输出文件路径
+        input_names: 输入名称
+        opset_version: ONNX opset 版本
+    """
+    model.eval()
+    with torch.no_grad():
+        sample = model(*dummy_inputs)
+
+    output_names = ["logits"]
+    if isinstance(sample, tuple) and isinstance(sample[1], dict):
+        output_names.extend(ATTENTION_PREFIX + key for key in sample[1])
+
+    # 所有输入共享同一个动态 batch 维，输出的 batch 维由导出器推导
+    batch = torch.export.Dim("batch")
+    torch.onnx.export(
+        model,
+        dummy_inputs,
+        str(output_path),
+        input_names=list(input_names),
+        output_names=output_names,
+        dynamic_shapes=tuple({0: batch} for _ in dummy_inputs),
+        opset_version=opset_version,
+    )
+    logger.info(f"ONNX 模型已导出: {output_path}")
@@ -4,11 +4,14 @@
 提供裁剪、缩放、归一化等共享预处理函数，供所有情绪识别器使用
 """
 
-from typing import Optional
+from functools import lru_cache
+from typing import Callable, Optional
 
 import cv2
 import numpy as np
 import torch
+import torch.nn.functional as F
+from torchvision.ops import roi_align
 
 from ...schemas.common import BoundingBox
 
@@ -26,10 +29,41 @@ FACE_MEAN = [0.47491485, 0.37161113, 0.32988098]
 FACE_STD = [0.28276006, 0.24852228, 0.24251911]
 
 
+@lru_cache(maxsize=None)
+def _affine_params(
+    mean: tuple[float, ...], std: tuple[float, ...]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    将 /255.0 与逐通道归一化折算为一次仿射变换 x * scale + bias
+
+    Args:
+        mean: RGB 通道均值
+        std: RGB 通道标准差
+
+    Returns:
+        (scale, bias)，形状均为 (3, 1, 1)，float32
+    """
+    mean_arr = np.asarray(mean, dtype=np.float64)
+    std_arr = np.asarray(std, dtype=np.float64)
+    scale = (1.0 / (255.0 * std_arr)).astype(np.float32).reshape(3, 1, 1)
+    bias = (-mean_arr / std_arr).astype(np.float32).reshape(3, 1, 1)
+    return scale, bias
+
+
+@lru_cache(maxsize=None)
+def _affine_tensors(
+    mean: tuple[float, ...], std: tuple[float, ...], device: torch.device
+) -> tuple[torch.Tensor, torch.Tensor]:
+    """_affine_params 的张量形式，按设备缓存，常量只上传一次"""
+    scale, bias = _affine_params(mean, std)
+    return torch.from_numpy(scale).to(device), torch.from_numpy(bias).to(device)
+
+
 def crop_region(
     frame: np.ndarray,
     bbox: BoundingBox,
     target_size: tuple[int, int],
+    out: Optional[np.ndarray] = None,
 ) -> np.ndarray:
     """
     从帧中裁剪指定区域并缩放到目标尺寸
@@ -38,9 +72,10 @@ def crop_region(
         frame: 输入图像帧 (BGR, HWC, uint8)
         bbox: 边界框
         target_size: 目标尺寸 (height, width)
+        out: 可选的输出数组 (height, width, 3) uint8，提供时结果直接写入其中
 
     Returns:
-        裁剪并缩放后的图像 (BGR, HWC, uint8)
+        裁剪并缩放后的图像 (BGR, HWC, uint8)，提供 out 时即为 out
     """
     h, w = frame.shape[:2]
 
@@ -52,13 +87,48 @@ def crop_region(
 
     # 处理无效区域（零面积）
     if x2 <= x1 or y2 <= y1:
-        return np.zeros((target_size[0], target_size[1], 3), dtype=np.uint8)
+        if out is None:
+            return np.zeros((target_size[0], target_size[1], 3), dtype=np.uint8)
+        out.fill(0)
+        return out
 
     crop = frame[y1:y2, x1:x2]
-    resized = cv2.resize(
-        crop, (target_size[1], target_size[0]), interpolation=cv2.INTER_LINEAR
+    return cv2.resize(
+        crop,
+        (target_size[1], target_size[0]),
+        dst=out,
+        interpolation=cv2.INTER_LINEAR,
     )
-    return resized
+
+
+def _normalize_bgr(
+    images: np.ndarray,
+    mean: list[float],
+    std: list[float],
+) -> np.ndarray:
+    """
+    将 BGR uint8 图像（单张或批次）一次乘加归一化为 RGB float32 数组
+
+    通道翻转（BGR→RGB）与 HWC→CHW 以视图完成，结果直接写入唯一一块输出缓冲区，
+    不再产生 cvtColor、permute、.float() 等中间缓冲区
+
+    Args:
+        images: 输入图像 (..., H, W, 3), BGR, uint8
+        mean: RGB 通道均值
+        std: RGB 通道标准差
+
+    Returns:
+        归一化数组 (..., 3, H, W), float32
+    """
+    scale, bias = _affine_params(tuple(mean), tuple(std))
+
+    # (..., H, W, BGR) → (..., RGB, H, W)（视图，不复制）
+    chw_rgb = np.moveaxis(images, -1, -3)[..., ::-1, :, :]
+
+    out = np.empty(chw_rgb.shape, dtype=np.float32)
+    np.multiply(chw_rgb, scale, out=out)
+    out += bias
+    return out
 
 
 def to_normalized_tensor(
@@ -69,8 +139,6 @@ def to_normalized_tensor(
     """
     将 BGR uint8 图像转换为归一化的 PyTorch 张量
 
-    流程: BGR→RGB → HWC→CHW → /255.0 → per-channel normalize
-
     Args:
         crop: 输入图像 (BGR, HWC, uint8)
         mean: RGB 通道均值
@@ -79,23 +147,54 @@ def to_normalized_tensor(
     Returns:
         归一化张量 (C, H, W), float32
     """
-    # BGR → RGB
-    rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+    return torch.from_numpy(_normalize_bgr(crop, mean, std))
+
+
+def _normalize_on_device(
+    images: torch.Tensor,
+    mean: list[float],
+    std: list[float],
+) -> torch.Tensor:
+    """
+    在张量所在设备上原地完成 /255.0 与逐通道归一化
+
+    Args:
+        images: 输入张量 (B, 3, H, W), float32, 取值 0~255
+        mean: RGB 通道均值
+        std: RGB 通道标准差
+
+    Returns:
+        归一化后的同一张量
+    """
+    scale, bias = _affine_tensors(tuple(mean), tuple(std), images.device)
+    return images.mul_(scale).add_(bias)
+
+
+def upload_frame(frame: np.ndarray, device: torch.device) -> Optional[torch.Tensor]:
+    """
+    将整帧一次性上传到 GPU，供批量裁剪使用
 
-    # HWC uint8 → CHW float32, /255.0
-    tensor = torch.from_numpy(rgb).permute(2, 0, 1).float().div_(255.0)
+    非 CUDA 设备返回 None，预处理继续使用 OpenCV 路径
 
-    # Per-channel normalize
-    mean_t = torch.tensor(mean, dtype=torch.float32).view(3, 1, 1)
-    std_t = torch.tensor(std, dtype=torch.float32).view(3, 1, 1)
-    tensor.sub_(mean_t).div_(std_t)
+    Args:
+        frame: 输入图像帧 (BGR, HWC, uint8)
+        device: 目标设备
 
-    return tensor
+    Returns:
+        帧张量 (1, 3, H, W), RGB, float32, 取值 0~255
+    """
+    if device.type != "cuda":
+        return None
+
+    tensor = _to_device(torch.from_numpy(frame), device)
+    # HWC BGR → 1CHW RGB
+    return tensor.permute(2, 0, 1).flip(0).unsqueeze(0).float()
 
 
 def prepare_context(
     frame: np.ndarray,
     size: tuple[int, int] = (224, 224),
+    frame_tensor: Optional[torch.Tensor] = None,
 ) -> torch.Tensor:
     """
     预处理全图（上下文区域）
@@ -103,10 +202,17 @@ def prepare_context(
     Args:
         frame: 输入图像帧 (BGR, HWC, uint8)
         size: 目标尺寸 (height, width)
+        frame_tensor: upload_frame 得到的帧张量，提供时在 GPU 上缩放
 
     Returns:
         归一化张量 (3, H, W)
     """
+    if frame_tensor is not None:
+        resized = F.interpolate(
+            frame_tensor, size=size, mode="bilinear", align_corners=False
+        )
+        return _normalize_on_device(resized, IMAGE_MEAN, IMAGE_STD)[0]
+
     resized = cv2.resize(frame, (size[1], size[0]), interpolation=cv2.INTER_LINEAR)
     return to_normalized_tensor(resized, IMAGE_MEAN, IMAGE_STD)
 
@@ -151,20 +257,181 @@ def prepare_body(
     return to_normalized_tensor(crop, BODY_MEAN, BODY_STD)
 
 
-def batch_tensors(
-    tensors: list[torch.Tensor],
+def prepare_regions(
+    frame: np.ndarray,
+    bboxes: list[BoundingBox],
+    size: tuple[int, int],
+    mean: list[float],
+    std: list[float],
     device: torch.device,
+    frame_tensor: Optional[torch.Tensor] = None,
 ) -> Optional[torch.Tensor]:
     """
-    将张量列表堆叠为批次并移至指定设备
+    批量裁剪、缩放并归一化多个区域
+
+    提供 frame_tensor 时用一次 roi_align 在 GPU 上完成全部区域的裁剪与双线性缩放，
+    否则逐区域用 OpenCV 裁剪缩放到同一批次数组后整体上传
 
     Args:
-        tensors: 张量列表，每个形状为 (C, H, W)
+        frame: 输入图像帧 (BGR, HWC, uint8)
+        bboxes: 区域边界框列表
+        size: 目标尺寸 (height, width)
+        mean: RGB 通道均值
+        std: RGB 通道标准差
         device: 目标设备
+        frame_tensor: upload_frame 得到的帧张量
 
     Returns:
-        批次张量 (B, C, H, W)，列表为空时返回 None
+        批次张量 (B, 3, H, W)，列表为空时返回 None
     """
-    if not tensors:
+    if not bboxes:
         return None
-    return torch.stack(tensors).to(device)
+
+    if frame_tensor is None:
+        # 各区域直接缩放写入同一块 uint8 批次数组，整批只做一次类型转换与归一化，
+        # 归一化结果直接写入唯一的 float32 批次缓冲区
+        crops = np.empty((len(bboxes), size[0], size[1], 3), dtype=np.uint8)
+        for i, bbox in enumerate(bboxes):
+            crop_region(frame, bbox, size, out=crops[i])
+        images = torch.from_numpy(_normalize_bgr(crops, mean, std))
+        return _to_device(images, device)
+
+    # 与 crop_region 相同的整数裁剪与边界处理
+    h, w = frame.shape[:2]
+    rois = np.zeros((len(bboxes), 5), dtype=np.float32)
+    for i, bbox in enumerate(bboxes):
+        rois[i, 1:] = (
+            max(0, int(bbox.x)),
+            max(0, int(bbox.y)),
+            min(w, int(bbox.x2)),
+            min(h, int(bbox.y2)),
+        )
+    valid = (rois[:, 3] > rois[:, 1]) & (rois[:, 4] > rois[:, 2])
+
+    # aligned=True + 每格单点采样，与 cv2.resize(INTER_LINEAR) 的像素中心对齐方式一致
+    crops = roi_align(
+        frame_tensor,
+        _to_device(torch.from_numpy(rois), device),
+        output_size=size,
+        spatial_scale=1.0,
+        sampling_ratio=1,
+        aligned=True,
+    )
+    if not valid.all():
+        # 零面积区域与 CPU 路径一致，输出全零图像
+        crops[torch.from_numpy(~valid).to(device)] = 0.0
+
+    return _normalize_on_device(crops, mean, std)
+
+
+def broadcast_tensor(
+    tensor: torch.Tensor,
+    batch_size: int,
+    device: torch.device,
+) -> torch.Tensor:
+    """
+    将单个张量上传到设备后沿批次维广播（不复制数据）
+
+    用于全图上下文等所有样本共享的输入，只传输一份数据
+
+    Args:
+        tensor: 输入张量 (C, H, W)
+        batch_size: 批次大小
+        device: 目标设备
+
+    Returns:
+        批次张量视图 (B, C, H, W)
+    """
+    single = _to_device(tensor.unsqueeze(0), device)
+    return single.expand(batch_size, -1, -1, -1)
+
+
+def _to_device(tensor: torch.Tensor, device: torch.device) -> torch.Tensor:
+    """移至目标设备，CUDA 下经锁页内存异步传输"""
+    if device.type == "cuda" and not tensor.is_cuda:
+        return tensor.pin_memory().to(device, non_blocking=True)
+    return tensor.to(device)
+
+
+class FrameInputs:
+    """
+    单帧预处理结果缓存
+
+    整帧只上传一次，全图与各区域的预处理结果按尺寸缓存，
+    同一帧上运行多个识别器时可共享，避免重复裁剪与传输
+    """
+
+    def __init__(self, frame: np.ndarray, device: torch.device):
+        """
+        Args:
+            frame: 输入图像帧 (BGR, HWC, uint8)
+            device: 目标设备
+        """
+        self.frame = frame
+        self.device = device
+        self._frame_tensor: Optional[torch.Tensor] = None
+        self._uploaded = False
+        self._cache: dict[tuple, torch.Tensor] = {}
+
+    @property
+    def frame_tensor(self) -> Optional[torch.Tensor]:
+        """upload_frame 的结果，首次使用时才上传"""
+        if not self._uploaded:
+            self._frame_tensor = upload_frame(self.frame, self.device)
+            self._uploaded = True
+        return self._frame_tensor
+
+    def context(self, size: tuple[int, int]) -> torch.Tensor:
+        """全图上下文张量 (3, H, W)"""
+        key = ("context", size)
+        if key not in self._cache:
+            self._cache[key] = prepare_context(self.frame, size, self.frame_tensor)
+        return self._cache[key]
+
+    def shared(
+        self, key: tuple, compute: Callable[[], torch.Tensor]
+    ) -> torch.Tensor:
+        """
+        按键缓存由帧输入派生的张量（如 CLIP caption 嵌入）
+
+        同一帧上的多个识别器使用相同的键时只计算一次
+
+        Args:
+            key: 缓存键
+            compute: 缓存未命中时调用的计算函数
+        """
+        key = ("shared", *key)
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def faces(
+        self, bboxes: list[BoundingBox], size: tuple[int, int]
+    ) -> Optional[torch.Tensor]:
+        """人脸区域批次张量 (B, 3, H, W)"""
+        return self._regions("face", bboxes, size, FACE_MEAN, FACE_STD)
+
+    def bodies(
+        self, bboxes: list[BoundingBox], size: tuple[int, int]
+    ) -> Optional[torch.Tensor]:
+        """人体区域批次张量 (B, 3, H, W)"""
+        return self._regions("body", bboxes, size, BODY_MEAN, BODY_STD)
+
+    def _regions(
+        self,
+        kind: str,
+        bboxes: list[BoundingBox],
+        size: tuple[int, int],
+        mean: list[float],
+        std: list[float],
+    ) -> Optional[torch.Tensor]:
+        """按区域类型、尺寸与边界框缓存 prepare_regions 的结果"""
+        if not bboxes:
+            return None
+
+        key = (kind, size, tuple((b.x, b.y, b.width, b.height) for b in bboxes))
+        if key not in self._cache:
+            self._cache[key] = prepare_regions(
+                self.frame, bboxes, size, mean, std, self.device, self.frame_tensor
+            )
+        return self._cache[key]
@@ -382,7 +382,7 @@ class FaceTracker:
             del self.tracks[track_id]
 
         if stale_ids:
-            logger.debug(f"清理 {len(stale_ids)} 个过期轨迹")
+            logger.debug("清理 {} 个过期轨迹", len(stale_ids))
 
     def reset(self) -> None:
         """重置跟踪器（切换视频源时调用）"""
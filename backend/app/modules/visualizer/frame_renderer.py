@@ -4,7 +4,7 @@
 在图像帧上绘制检测结果和情绪标签
 """
 
-import base64
+import heapq
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
@@ -13,6 +13,7 @@ import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
 from ...schemas.pipeline import VisualizerConfig
+from ...utils.frame_utils import encode_frame_to_jpeg
 from ...utils.logger import get_logger
 from ..detector.schemas import Detection, DetectionType
 from ..recognizer.schemas import EmotionResult
@@ -40,10 +41,10 @@ def _load_cjk_font(size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
         if font_path.exists():
             try:
                 font = ImageFont.truetype(str(font_path), size)
-                logger.info("已加载字体: %s (size=%d)", font_path.name, size)
+                logger.info("已加载字体: {} (size={})", font_path.name, size)
                 return font
             except Exception:
-                logger.debug("字体加载失败: %s", font_path)
+                logger.debug("字体加载失败: {}", font_path)
                 continue
     logger.warning("未找到CJK字体，回退到PIL默认字体")
     return ImageFont.load_default()
@@ -63,6 +64,8 @@ class FrameRenderer:
     负责在图像帧上绘制检测框、情绪标签等可视化元素
     """
 
+    TEXT_BBOX_CACHE_SIZE = 1024  # 文本尺寸缓存上限（情绪标签 × 置信度组合有限）
+
     def __init__(self, config: VisualizerConfig):
         """
         初始化渲染器
@@ -72,6 +75,13 @@ class FrameRenderer:
         """
         self._config = config
         self._emotion_color_cache: Dict[str, Tuple[int, int, int]] = {}
+        # 文本 → 字体 bbox，避免每帧重复调用 FreeType 测量
+        self._text_bbox_cache: Dict[str, Tuple[int, int, int, int]] = {}
+        # 文本 → 栅格化后的抗锯齿覆盖度掩码，绘制时直接与帧混合
+        self._text_mask_cache: Dict[str, np.ndarray] = {}
+        self._text_blend_cache: Dict[
+            Tuple[str, Tuple[int, int, int]], Tuple[np.ndarray, np.ndarray]
+        ] = {}
         self._font = _load_cjk_font(self._font_size)
         self._update_color_cache()
 
@@ -80,6 +90,73 @@ class FrameRenderer:
         """根据 font_scale 计算 PIL 字体像素大小"""
         return max(12, int(self._config.font_scale * 20))
 
+    def _text_bbox(self, text: str) -> Tuple[int, int, int, int]:
+        """
+        获取文本在当前字体下的 bbox（带缓存）
+
+        Args:
+            text: 待测量文本
+
+        Returns:
+            (left, top, right, bottom)
+        """
+        bbox = self._text_bbox_cache.get(text)
+        if bbox is None:
+            if len(self._text_bbox_cache) >= self.TEXT_BBOX_CACHE_SIZE:
+                self._text_bbox_cache.clear()
+            bbox = tuple(int(v) for v in self._font.getbbox(text))
+            self._text_bbox_cache[text] = bbox
+        return bbox
+
+    def _text_mask(self, text: str) -> np.ndarray:
+        """
+        获取文本的覆盖度掩码（带缓存）
+
+        掩码与 _text_bbox 返回的 bbox 对齐，值为 0~255 的抗锯齿覆盖度
+
+        Args:
+            text: 待绘制文本
+
+        Returns:
+            掩码 (bottom - top, right - left, 1), uint32
+        """
+        mask = self._text_mask_cache.get(text)
+        if mask is None:
+            if len(self._text_mask_cache) >= self.TEXT_BBOX_CACHE_SIZE:
+                self._text_mask_cache.clear()
+            left, top, right, bottom = self._text_bbox(text)
+            image = Image.new("L", (max(1, right - left), max(1, bottom - top)), 0)
+            ImageDraw.Draw(image).text((-left, -top), text, font=self._font, fill=255)
+            mask = np.asarray(image, dtype=np.uint32)[:, :, None]
+            self._text_mask_cache[text] = mask
+        return mask
+
+    def _text_blend(
+        self, text: str, color: Tuple[int, int, int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        获取文本按指定颜色混合所需的两项（带缓存）
+
+        标签文本与颜色组合有限，预先算好与背景无关的部分，
+        每帧混合只剩一次乘法与一次加法
+
+        Args:
+            text: 待绘制文本
+            color: 文本颜色 (BGR)
+
+        Returns:
+            (255 - a, ink * a + 128)，形状与 _text_mask 相同，uint32
+        """
+        key = (text, color)
+        layers = self._text_blend_cache.get(key)
+        if layers is None:
+            if len(self._text_blend_cache) >= self.TEXT_BBOX_CACHE_SIZE:
+                self._text_blend_cache.clear()
+            mask = self._text_mask(text)
+            layers = (255 - mask, np.array(color, dtype=np.uint32) * mask + 128)
+            self._text_blend_cache[key] = layers
+        return layers
+
     def _update_color_cache(self) -> None:
         """更新颜色缓存"""
         self._emotion_color_cache = {
@@ -96,12 +173,16 @@ class FrameRenderer:
         self._update_color_cache()
         if self._font_size != old_font_size:
             self._font = _load_cjk_font(self._font_size)
+            self._text_bbox_cache.clear()
+            self._text_mask_cache.clear()
+            self._text_blend_cache.clear()
 
     def render(
         self,
         frame: np.ndarray,
         detections: List[Detection],
         emotions: Optional[List[EmotionResult]] = None,
+        inplace: bool = False,
     ) -> np.ndarray:
         """
         渲染帧
@@ -110,12 +191,13 @@ class FrameRenderer:
             frame: 输入图像帧 (BGR格式)
             detections: 检测结果列表
             emotions: 情绪识别结果列表 (可选)
+            inplace: 直接在 frame 上绘制，省去整帧复制；仅在调用方之后不再使用原始帧时启用
 
         Returns:
-            渲染后的图像帧
+            渲染后的图像帧（inplace 时即为 frame）
         """
-        # 复制帧以避免修改原始数据
-        rendered = frame.copy()
+        # 默认复制帧以避免修改原始数据
+        rendered = frame if inplace else frame.copy()
 
         # 构建检测ID到情绪结果的映射
         emotion_map: Dict[int, EmotionResult] = {}
@@ -178,7 +260,7 @@ class FrameRenderer:
                 if face_index is not None:
                     text = str(face_index)
                     # 获取文本尺寸
-                    bbox = self._font.getbbox(text)
+                    bbox = self._text_bbox(text)
                     tw = int(bbox[2] - bbox[0])
                     th = int(bbox[3] - bbox[1])
                     
@@ -197,12 +279,10 @@ class FrameRenderer:
                     roi_x2, roi_y2 = int(tx + tw), int(ty + th + bbox[1])
                     
                     if 0 <= roi_x1 < frame_w and 0 <= roi_y1 < frame_h:
-                        roi = frame[roi_y1:roi_y2, roi_x1:roi_x2]
-                        pil_roi = Image.fromarray(cv2.cvtColor(roi, cv2.COLOR_BGR2RGB))
-                        draw = ImageDraw.Draw(pil_roi)
-                        draw.text((0, -bbox[1]), text, font=self._font, fill=(0, 0, 0))
-                        frame[roi_y1:roi_y2, roi_x1:roi_x2] = cv2.cvtColor(
-                            np.array(pil_roi), cv2.COLOR_RGB2BGR
+                        self._draw_texts(
+                            frame,
+                            (roi_x1, roi_y1, roi_x2, roi_y2),
+                            [((roi_x1, roi_y1 - bbox[1]), text, (0, 0, 0))],
                         )
         elif detection.type == DetectionType.PERSON:
             if not self._config.show_person_box:
@@ -242,9 +322,9 @@ class FrameRenderer:
 
         # 1. 准备要绘制的所有标签数据
         display_count = getattr(self._config, "emotion_display_count", 2)
-        sorted_emotions = sorted(
-            emotion.probabilities.items(), key=lambda x: x[1], reverse=True
-        )[:display_count]
+        sorted_emotions = heapq.nlargest(
+            display_count, emotion.probabilities.items(), key=lambda x: x[1]
+        )
 
         labels_data = []
         max_text_width = 0
@@ -262,20 +342,19 @@ class FrameRenderer:
                 continue
 
             text = " ".join(parts)
-            # 使用 PIL 测量文本尺寸
-            bbox = self._font.getbbox(text)
+            # 使用 PIL 测量文本尺寸（按文本缓存）
+            bbox = self._text_bbox(text)
             tw = int(bbox[2] - bbox[0])
             th = int(bbox[3] - bbox[1])
 
-            # 获取颜色 (从缓存中获取 BGR 并转换为 RGB 用于 PIL)
+            # 获取颜色（BGR，直接用于在 BGR 数据上绘制）
             bgr = self._emotion_color_cache.get(emotion_label, self._default_color)
-            rgb = (bgr[2], bgr[1], bgr[0])
 
             label_h = th + padding * 2
             
             labels_data.append({
                 "text": text,
-                "rgb": rgb,
+                "bgr": bgr,
                 "tw": tw,
                 "th": th,
                 "label_h": label_h,
@@ -313,24 +392,53 @@ class FrameRenderer:
         if roi_x2 <= roi_x1 or roi_y2 <= roi_y1:
             return
 
-        # 4. 使用 PIL 绘制文本（直接在 ROI 上绘制实现透明背景效果）
-        roi = frame[roi_y1:roi_y2, roi_x1:roi_x2]
-        pil_roi = Image.fromarray(cv2.cvtColor(roi, cv2.COLOR_BGR2RGB))
-        draw = ImageDraw.Draw(pil_roi)
-
+        # 4. 在 ROI 内绘制全部文本（透明背景效果）
+        texts = []
         current_y_offset = 0
         for item in labels_data:
-            # 文本在 ROI 内的相对偏移
-            text_x = int(stack_x_start + padding - roi_x1)
-            text_y = int(stack_y_start + current_y_offset + padding - roi_y1 - item["y_offset"])
-
-            draw.text((text_x, text_y), item["text"], font=self._font, fill=item["rgb"])
+            text_x = int(stack_x_start + padding)
+            text_y = int(stack_y_start + current_y_offset + padding - item["y_offset"])
+            texts.append(((text_x, text_y), item["text"], item["bgr"]))
             current_y_offset += item["label_h"] + padding
 
-        # 5. 写回 frame (RGB -> BGR)
-        frame[roi_y1:roi_y2, roi_x1:roi_x2] = cv2.cvtColor(
-            np.array(pil_roi), cv2.COLOR_RGB2BGR
-        )
+        self._draw_texts(frame, (roi_x1, roi_y1, roi_x2, roi_y2), texts)
+
+    def _draw_texts(
+        self,
+        frame: np.ndarray,
+        roi: Tuple[int, int, int, int],
+        texts: List[Tuple[Tuple[int, int], str, Tuple[int, int, int]]],
+    ) -> None:
+        """
+        在帧的 ROI 区域内绘制文本（透明背景）
+
+        文本只在首次出现时经 PIL 栅格化为覆盖度掩码，之后每帧直接按缓存的混合项与帧混合，
+        混合公式与 PIL 绘制文本时一致，结果逐像素相同
+
+        Args:
+            frame: 图像帧（原地修改）
+            roi: 绘制区域 (x1, y1, x2, y2)，超出该区域或帧边界的部分被裁剪
+            texts: [(帧坐标下的文本位置, 文本, BGR 颜色)]
+        """
+        rx1, ry1, rx2, ry2 = roi
+        rx2 = min(rx2, frame.shape[1])
+        ry2 = min(ry2, frame.shape[0])
+        for (tx, ty), text, color in texts:
+            inv_alpha, ink = self._text_blend(text, color)
+            left, top = self._text_bbox(text)[:2]
+            x0, y0 = tx + left, ty + top
+            x1, y1 = max(x0, rx1), max(y0, ry1)
+            x2 = min(x0 + ink.shape[1], rx2)
+            y2 = min(y0 + ink.shape[0], ry2)
+            if x2 <= x1 or y2 <= y1:
+                continue
+
+            clip = (slice(y1 - y0, y2 - y0), slice(x1 - x0, x2 - x0))
+            region = frame[y1:y2, x1:x2]
+            # 与 PIL 的 BLEND 宏一致: (bg * (255 - a) + ink * a) / 255，带舍入
+            tmp = region * inv_alpha[clip]
+            tmp += ink[clip]
+            region[:] = ((tmp >> 8) + tmp) >> 8
 
     def _draw_emotion_bar(
         self, frame: np.ndarray, x: int, y: int, emotion: EmotionResult
@@ -349,9 +457,9 @@ class FrameRenderer:
 
         # 按概率排序，使用配置的显示数量
         display_count = getattr(self._config, 'emotion_display_count', 2)
-        sorted_emotions = sorted(
-            emotion.probabilities.items(), key=lambda x: x[1], reverse=True
-        )[:display_count]
+        sorted_emotions = heapq.nlargest(
+            display_count, emotion.probabilities.items(), key=lambda x: x[1]
+        )
 
         current_y = y + padding
 
@@ -391,6 +499,4 @@ class FrameRenderer:
         Returns:
             Base64编码的JPEG图像字符串
         """
-        encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
-        _, buffer = cv2.imencode(".jpg", frame, encode_params)
-        return base64.b64encode(buffer.tobytes()).decode("utf-8")
+        return encode_frame_to_jpeg(frame, quality)
@@ -25,6 +25,22 @@ class RecognizerType(str, Enum):
     CAER = "caer"
 
 
+class Precision(str, Enum):
+    """识别器推理精度"""
+
+    FP32 = "fp32"
+    FP16 = "fp16"
+    BF16 = "bf16"
+
+
+class InferenceBackend(str, Enum):
+    """情绪识别推理后端"""
+
+    TORCH = "torch"
+    ONNX = "onnx"
+    TENSORRT = "tensorrt"
+
+
 class DetectorConfig(BaseModel):
     """目标检测器配置"""
 
@@ -46,6 +62,16 @@ class DetectorConfig(BaseModel):
     min_face_area_ratio: float = Field(
         default=0.0, ge=0.0, le=1.0, description="最小人脸面积占画面比例，低于此值的检测框将被过滤"
     )
+    batch_size: int = Field(
+        default=8,
+        ge=1,
+        le=64,
+        description="导出 TensorRT 引擎时的最大 batch（流水线逐帧检测，不影响 PyTorch 推理）",
+    )
+    use_tensorrt: bool = Field(
+        default=False,
+        description="CUDA 上首次加载时导出并使用 FP16 TensorRT 引擎（动态 batch，上限为 batch_size）",
+    )
 
 
 class RecognizerConfig(BaseModel):
@@ -63,6 +89,45 @@ class RecognizerConfig(BaseModel):
     batch_size: int = Field(default=8, ge=1, le=64, description="批处理大小")
     use_face: bool = Field(default=True, description="使用人脸区域特征")
     use_body: bool = Field(default=True, description="使用人体区域特征")
+    inference_backend: InferenceBackend = Field(
+        default=InferenceBackend.TORCH,
+        description="推理后端: torch/onnx/tensorrt",
+    )
+    engine_path: Optional[str] = Field(
+        default=None, description="ONNX 模型文件路径（onnx/tensorrt 后端使用）"
+    )
+    precision: Precision = Field(
+        default=Precision.FP32,
+        description="推理精度: fp32/fp16/bf16（半精度仅在 CUDA 上生效：冻结骨干网络预先转换，其余以 autocast 执行）",
+    )
+    channels_last: bool = Field(
+        default=False,
+        description="卷积权重使用 channels_last 内存布局（仅 torch 后端）",
+    )
+    compile_backbones: bool = Field(
+        default=False,
+        description="用 torch.compile 编译参数冻结的骨干网络（仅 torch 后端，CUDA 上启用 CUDA Graph）",
+    )
+    quantize_caption: bool = Field(
+        default=False,
+        description="CPU 上将 CLIP caption 编码器的 Linear 层动态量化为 INT8（仅 torch 后端）",
+    )
+    cuda_graph: bool = Field(
+        default=False,
+        description="将整个前向录制为 CUDA Graph 重放（仅 CUDA 上的 torch 后端，批次补齐到 2 的幂）",
+    )
+    result_cache_px: float = Field(
+        default=0.0,
+        ge=0.0,
+        le=32.0,
+        description="人脸框各边移动小于该像素数时复用上一帧识别结果（0 表示关闭）",
+    )
+    result_cache_max_frames: int = Field(
+        default=15,
+        ge=1,
+        le=300,
+        description="同一识别结果最多连续复用的帧数，超过后重新推理",
+    )
 
 
 class VisualizerConfig(BaseModel):
@@ -99,6 +164,9 @@ class PerformanceConfig(BaseModel):
     skip_frames: int = Field(default=0, ge=0, le=10, description="跳帧数")
     async_inference: bool = Field(default=True, description="异步推理")
     output_quality: int = Field(default=80, ge=10, le=100, description="输出JPEG质量")
+    gpu_jpeg: bool = Field(
+        default=False, description="CUDA 可用时使用 nvJPEG 在 GPU 上编码输出帧"
+    )
 
     # 新增性能参数
     use_binary_ws: bool = Field(default=True, description="使用二进制WebSocket传输")
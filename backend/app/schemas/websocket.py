@@ -1,30 +1,33 @@
 """WebSocket消息数据模型"""
 
-from typing import Literal, Union
+from typing import Annotated, Literal, Union
 
 from pydantic import BaseModel, Field
+from typing_extensions import TypedDict
 
 from .common import BoundingBox
 
 
-class DetectionPayload(BaseModel):
+# 检测与情绪载荷每帧随消息批量下发，使用 TypedDict：
+# 嵌套在消息模型中时按字段整体校验，不再为每个元素实例化一个 BaseModel
+
+
+class DetectionPayload(TypedDict):
     """检测结果载荷"""
-    id: int = Field(..., description="检测目标ID")
-    type: Literal["face", "person"] = Field(..., description="检测类型")
-    bbox: BoundingBox = Field(..., description="边界框")
-    confidence: float = Field(..., description="置信度")
-    paired_id: int | None = Field(default=None, description="关联的face/person ID")
+    id: int  # 检测目标ID
+    type: Literal["face", "person"]  # 检测类型
+    bbox: BoundingBox  # 边界框
+    confidence: float  # 置信度
+    paired_id: int | None  # 关联的face/person ID
 
 
-class EmotionPayload(BaseModel):
+class EmotionPayload(TypedDict):
     """情绪识别结果载荷"""
-    detection_id: int = Field(..., description="关联的检测目标ID")
-    probabilities: dict[str, float] = Field(..., description="各情绪类别概率")
-    dominant_emotion: str = Field(..., description="主导情绪")
-    confidence: float = Field(..., description="置信度")
-    context_attention: dict[str, float] | None = Field(
-        default=None, description="上下文注意力得分"
-    )
+    detection_id: int  # 关联的检测目标ID
+    probabilities: dict[str, float]  # 各情绪类别概率
+    dominant_emotion: str  # 主导情绪
+    confidence: float  # 置信度
+    context_attention: dict[str, float] | None  # 上下文注意力得分
 
 
 class FrameMessage(BaseModel):
@@ -40,9 +43,8 @@ class FrameMessage(BaseModel):
 class BinaryFrameHeader(BaseModel):
     """二进制帧头部消息（用于二进制WebSocket传输）
 
-    传输协议：
-    1. 先发送此JSON头部
-    2. 紧接着发送二进制JPEG图像数据
+    传输协议（单条二进制消息）：
+    [4 字节大端头部长度][此JSON头部（UTF-8）][JPEG图像数据]
     """
     type: Literal["frame_header"] = "frame_header"
     timestamp: float = Field(..., description="时间戳")
@@ -101,5 +103,8 @@ class EventMessage(BaseModel):
     frame_id: int | None = Field(default=None, description="相关帧ID")
 
 
-# WebSocket消息联合类型
-WSMessage = Union[FrameMessage, StatusMessage, StatsMessage, ErrorMessage, EventMessage]
+# WebSocket消息联合类型（按 type 字段区分，校验时直接分派到对应模型）
+WSMessage = Annotated[
+    Union[FrameMessage, StatusMessage, StatsMessage, ErrorMessage, EventMessage],
+    Field(discriminator="type"),
+]
@@ -10,11 +10,18 @@ from typing import Optional
 import cv2
 import numpy as np
 
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
 
 def encode_frame_to_jpeg(frame: np.ndarray, quality: int = 80) -> str:
     """
     将图像帧编码为JPEG base64字符串
     
+    仅用于 JSON 消息（预览帧、兼容模式）；实时流应使用 encode_frame_bytes
+    配合二进制 WebSocket 帧，省去 base64 编码与约 33% 的体积膨胀
+    
     Args:
         frame: 图像帧 (BGR格式, HWC排列)
         quality: JPEG压缩质量 (1-100)
@@ -22,10 +29,25 @@ def encode_frame_to_jpeg(frame: np.ndarray, quality: int = 80) -> str:
     Returns:
         base64编码的JPEG图像字符串
     """
-    encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
-    _, buffer = cv2.imencode('.jpg', frame, encode_params)
-    buffer_bytes = np.array(buffer).tobytes()
-    return base64.b64encode(buffer_bytes).decode('utf-8')
+    return encode_base64(encode_frame_bytes(frame, quality))
+
+
+def encode_base64(data: bytes) -> str:
+    """
+    将字节数据编码为base64字符串
+
+    安装了 pybase64 时使用其 SIMD 实现并直接返回 str，否则回退到标准库
+
+    Args:
+        data: 待编码的字节数据
+
+    Returns:
+        base64字符串
+    """
+    if _b64encode_as_string is not None:
+        return _b64encode_as_string(data)
+    # base64 输出只含 ASCII 字符，ascii 解码比 utf-8 更快
+    return base64.b64encode(data).decode('ascii')
 
 
 def decode_jpeg_from_base64(image_base64: str) -> Optional[np.ndarray]:
@@ -46,12 +68,20 @@ def decode_jpeg_from_base64(image_base64: str) -> Optional[np.ndarray]:
         return None
 
 
+# pybase64 support (optional, SIMD base64 encoding)
+try:
+    from pybase64 import b64encode_as_string as _b64encode_as_string
+except ImportError:
+    _b64encode_as_string = None
+
+
 # TurboJPEG support (optional, faster encoding)
 try:
     from turbojpeg import TurboJPEG, TJPF_BGR
     _jpeg: TurboJPEG | None = TurboJPEG()
     _TJPF_BGR = TJPF_BGR
-except ImportError:
+except (ImportError, OSError, RuntimeError):
+    # 未安装 PyTurboJPEG，或找不到 libturbojpeg 动态库
     _jpeg = None
     _TJPF_BGR = 0  # Placeholder, won't be used if _jpeg is None
 
@@ -77,23 +107,73 @@ def encode_frame_turbo(frame: np.ndarray, quality: int = 80) -> bytes:
     return _jpeg.encode(frame, quality=quality, pixel_format=_TJPF_BGR)
 
 
-def encode_frame_bytes(frame: np.ndarray, quality: int = 80) -> bytes:
+# nvJPEG 编码专用 CUDA 流（首次使用时创建），避免排在下一帧推理的 kernel 之后
+_nvjpeg_stream = None
+# GPU 编码失败后置为 False，之后不再尝试
+_nvjpeg_usable = True
+
+
+def encode_frame_nvjpeg(frame: np.ndarray, quality: int = 80) -> bytes:
+    """
+    使用 nvJPEG 在 GPU 上编码帧为JPEG字节
+
+    通过 torchvision.io.encode_jpeg 的 CUDA 实现（torchvision>=0.19）：
+    上传整帧后在 GPU 上完成通道转换与压缩，只回传压缩后的字节
+
+    Args:
+        frame: 图像帧 (BGR格式, HWC排列)
+        quality: JPEG压缩质量 (1-100)
+
+    Returns:
+        JPEG编码的字节数据
+
+    Raises:
+        RuntimeError: CUDA 不可用
+    """
+    global _nvjpeg_stream
+    import torch
+    from torchvision.io import encode_jpeg
+
+    if not torch.cuda.is_available():
+        raise RuntimeError("CUDA 不可用")
+    if _nvjpeg_stream is None:
+        _nvjpeg_stream = torch.cuda.Stream()
+
+    with torch.cuda.stream(_nvjpeg_stream):
+        tensor = torch.from_numpy(frame).cuda(non_blocking=False)
+        # HWC BGR → CHW RGB
+        tensor = tensor.permute(2, 0, 1).flip(0).contiguous()
+        return encode_jpeg(tensor, quality=quality).cpu().numpy().tobytes()
+
+
+def encode_frame_bytes(
+    frame: np.ndarray, quality: int = 80, use_gpu: bool = False
+) -> bytes:
     """
     将帧编码为JPEG字节（优先使用TurboJPEG，回退到OpenCV）
     
     Args:
         frame: 图像帧 (BGR格式, HWC排列)
         quality: JPEG压缩质量 (1-100)
+        use_gpu: 优先使用 nvJPEG 在 GPU 上编码，不可用时回退到 CPU 编码
         
     Returns:
         JPEG编码的字节数据
     """
+    global _nvjpeg_usable
+    if use_gpu and _nvjpeg_usable:
+        try:
+            return encode_frame_nvjpeg(frame, quality)
+        except Exception as e:
+            _nvjpeg_usable = False
+            logger.warning(f"GPU JPEG 编码不可用，回退到 CPU 编码: {e}")
+
     if _jpeg is not None:
         return _jpeg.encode(frame, quality=quality, pixel_format=_TJPF_BGR)
     else:
         encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
         _, buffer = cv2.imencode('.jpg', frame, encode_params)
-        return np.array(buffer).tobytes()
+        return buffer.tobytes()
 
 
 def is_turbojpeg_available() -> bool:
@@ -40,8 +40,10 @@ class ClipCaptain(nn.Module):
     def forward(self, x):
         if self._dummy:
             return self.model(x)
-        x = self.model.get_image_features(x, output_hidden_states=True)  # type: ignore[arg-type]
-        return x
+        # 只需要投影后的图像嵌入，不请求各层隐藏状态（ViT 每层激活都会被保留并返回）
+        x = self.model.get_image_features(x)  # type: ignore[arg-type]
+        # transformers 5 起返回 BaseModelOutputWithPooling，嵌入在 pooler_output 中
+        return getattr(x, 'pooler_output', x)
 
 
 if __name__ == '__main__':
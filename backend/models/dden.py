@@ -14,10 +14,28 @@ class DDEN(nn.Module):
         super(DDEN, self).__init__()
         self.mode = args.mode
         self.dense_out_dim = args.dense_features + args.dense_layers * args.growth_rate
-        self.idn = InceptionResnetV1DDEN(pretrained='vggface2')
-        weights_frozen(self.idn)
-        self.fan = InceptionResnetV1DDEN(pretrained='vggface2')
-        self.dense = DenseNet(
+        # 子类通过 _build_* 替换分支，避免先构建（并加载预训练权重）再丢弃
+        self.idn, self.fan = self._build_extractors()
+        self.dense = self._build_dense(args)
+        self.proj_head = ProjectHead(self.dense_out_dim, args)
+        self.classifier = nn.Sequential(
+            nn.ReLU(),
+            nn.BatchNorm1d(self.proj_head.fc.out_features),
+            nn.Linear(self.proj_head.fc.out_features, args.num_classes),
+        )
+        kaiming_init(self.proj_head)
+        kaiming_init(self.classifier)
+
+    def _build_extractors(self):
+        # 冻结的身份分支 idn 与表情分支 fan
+        idn = InceptionResnetV1DDEN(pretrained='vggface2')
+        weights_frozen(idn)
+        fan = InceptionResnetV1DDEN(pretrained='vggface2')
+        kaiming_init(fan.block8)
+        return idn, fan
+
+    def _build_dense(self, args: argparse.Namespace):
+        return DenseNet(
             growth_rate=args.growth_rate,
             block_config=[args.dense_layers],
             num_classes=args.emb_dim,
@@ -27,15 +45,6 @@ class DDEN(nn.Module):
             num_init_features=args.dense_features,
             args=args,
         )
-        self.proj_head = ProjectHead(self.dense_out_dim, args)
-        self.classifier = nn.Sequential(
-            nn.ReLU(),
-            nn.BatchNorm1d(self.proj_head.fc.out_features),
-            nn.Linear(self.proj_head.fc.out_features, args.num_classes),
-        )
-        kaiming_init(self.proj_head)
-        kaiming_init(self.fan.block8)
-        kaiming_init(self.classifier)
 
     def forward(self, x):
         idf = self.idn(x)
@@ -50,11 +59,16 @@ class DDEN(nn.Module):
 
 
 class SDDENFPN(DDEN):
-    def __init__(self, args: argparse.Namespace):
-        super().__init__(args)
-        self.fan = InceptionResnetV1FPN(pretrained='vggface2')
-        self.idn = None
-        self.dense = DenseNetIRDDEN(
+    def _build_extractors(self):
+        # 只有 FPN 表情分支，不构建身份分支
+        fan = InceptionResnetV1FPN(pretrained='vggface2')
+        for layer in (fan.fix_depth1, fan.fix_depth2, fan.fix_depth3, fan.fix_depth4,
+                      fan.smooth1, fan.smooth2, fan.smooth3, fan.smooth4):
+            kaiming_init(layer)
+        return None, fan
+
+    def _build_dense(self, args: argparse.Namespace):
+        return DenseNetIRDDEN(
             growth_rate=args.growth_rate,
             block_config=[args.dense_layers],
             num_classes=args.emb_dim,
@@ -65,14 +79,6 @@ class SDDENFPN(DDEN):
             num_input_features=1792,
             args=args,
         )
-        kaiming_init(self.fan.fix_depth1)
-        kaiming_init(self.fan.fix_depth2)
-        kaiming_init(self.fan.fix_depth3)
-        kaiming_init(self.fan.fix_depth4)
-        kaiming_init(self.fan.smooth1)
-        kaiming_init(self.fan.smooth2)
-        kaiming_init(self.fan.smooth3)
-        kaiming_init(self.fan.smooth4)
 
     def forward(self, x):
         x = self.fan(x)
@@ -7,6 +7,38 @@ from .fer_cnn import load_trained_sfer
 from .clip import ClipCaptain
 
 
+def run_backbones(calls, stream_cache, parallel=True):
+    """
+    并行执行互不依赖的骨干网络：第一个在当前流上，其余各自在固定的旁路 CUDA 流上，
+    返回前当前流等待所有旁路流，融合层即可直接使用输出。
+    旁路流按设备缓存在 stream_cache 中，每次先等待当前流，因此也可被 CUDA Graph 录制。
+    parallel 为 False（如训练时）、非 CUDA 输入或 tracing 时顺序执行。
+
+    calls: [(module, input), ...]，返回各模块输出列表
+    """
+    x0 = calls[0][1]
+    if not parallel or len(calls) < 2 or not x0.is_cuda or torch.jit.is_tracing():
+        return [module(x) for module, x in calls]
+
+    device = x0.device
+    streams = stream_cache.get(device)
+    if streams is None or len(streams) < len(calls) - 1:
+        streams = [torch.cuda.Stream(device=device) for _ in range(len(calls) - 1)]
+        stream_cache[device] = streams
+
+    current = torch.cuda.current_stream(device)
+    outputs = [None] * len(calls)
+    for i, (module, x) in enumerate(calls[1:], start=1):
+        stream = streams[i - 1]
+        stream.wait_stream(current)
+        with torch.cuda.stream(stream):
+            outputs[i] = module(x)
+    outputs[0] = calls[0][0](x0)
+    for stream in streams[: len(calls) - 1]:
+        current.wait_stream(stream)
+    return outputs
+
+
 class SESeg1D(nn.Module):
 
     def __init__(
@@ -70,6 +102,7 @@ class SEEmoticQuadrupleStream(nn.Module):
         self.fc_cat = nn.Linear(256, 26)
         self.fc_cont = nn.Linear(256, 3)
         self.brief = 'SEQuadrupleStreamNet'
+        self._backbone_streams = {}  # 推理时各骨干网络使用的 CUDA 流（按设备）
 
     @staticmethod
     def _mean_attention(attn, start, length):
@@ -100,11 +133,26 @@ class SEEmoticQuadrupleStream(nn.Module):
             )
         return normalized_scores
 
-    def forward(self, x_context, x_body, x_face):
-        context_features = self.model_context(x_context).view(-1, self.num_context_features)
-        body_features = self.model_body(x_body).view(-1, self.num_body_features)
-        face_features = self.model_face(x_face).view(-1, self.num_face_features)
-        caption_features = self.model_caption(x_context).view(-1, self.num_caption_features)
+    @property
+    def caption_encoder(self):
+        return self.model_caption
+
+    def forward(self, x_context, x_body, x_face, caption_features=None):
+        # caption_features: 预先计算的 CLIP 嵌入 (1 或 B, num_caption)，提供时跳过 caption 流
+        calls = [(self.model_context, x_context), (self.model_body, x_body), (self.model_face, x_face)]
+        if caption_features is None:
+            calls.append((self.model_caption, x_context))
+        # 各骨干网络互不依赖，推理时在多个 CUDA 流上并行执行
+        outputs = run_backbones(calls, self._backbone_streams, parallel=not self.training)
+        context_features = outputs[0].view(-1, self.num_context_features)
+        body_features = outputs[1].view(-1, self.num_body_features)
+        face_features = outputs[2].view(-1, self.num_face_features)
+        if caption_features is None:
+            caption_features = outputs[3].view(-1, self.num_caption_features)
+        else:
+            caption_features = caption_features.to(context_features.dtype).expand(
+                context_features.shape[0], -1
+            )
 
         context_attention = None
 
@@ -197,6 +245,7 @@ class CaerMultiStream(nn.Module):
         )
         self.fc_cat = nn.Linear(256, 7)
         self.brief = 'CaerMultiStream'
+        self._backbone_streams = {}  # 推理时各骨干网络使用的 CUDA 流（按设备）
 
     @staticmethod
     def _mean_attention(attn, start, length):
@@ -219,11 +268,22 @@ class CaerMultiStream(nn.Module):
             )
         return normalized_scores
 
-    def forward(self, x_context, x_face):
+    @property
+    def caption_encoder(self):
+        return self.models[2]
+
+    def forward(self, x_context, x_face, caption_features=None):
+        # caption_features: 预先计算的 CLIP 嵌入 (1 或 B, num_caption)，提供时跳过 caption 流
         xs = [x_context, x_face, x_context]
-        features = []
-        for i in range(len(xs)):
-            features.append(self.models[i](xs[i]).view(-1, self.num_features[i]))
+        num_streams = len(xs) if caption_features is None else 2
+        calls = [(self.models[i], xs[i]) for i in range(num_streams)]
+        # 各骨干网络互不依赖，推理时在多个 CUDA 流上并行执行
+        outputs = run_backbones(calls, self._backbone_streams, parallel=not self.training)
+        features = [outputs[i].view(-1, self.num_features[i]) for i in range(num_streams)]
+        if caption_features is not None:
+            features.append(
+                caption_features.to(features[0].dtype).expand(features[0].shape[0], -1)
+            )
 
         if not isinstance(self.first_attn, SESeg1D) or not isinstance(self.attn, SESeg1D):
             features_low = self.first_attn(torch.cat(features[: 2], 1))
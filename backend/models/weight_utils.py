@@ -1,3 +1,6 @@
+import pickle
+import zipfile
+
 import torch
 import torch.nn as nn
 
@@ -18,14 +21,24 @@ def kaiming_init(module):
                 nn.init.constant_(m.bias, 0)
 
 
+def _load_checkpoint(model_path):
+    # zip 格式（torch>=1.6 默认）的检查点用 mmap 读取，张量按需从文件映射，不整体读入内存
+    mmap = zipfile.is_zipfile(model_path)
+    try:
+        return torch.load(model_path, map_location='cpu', mmap=mmap, weights_only=True)
+    except pickle.UnpicklingError:
+        # 检查点中保存了张量以外的对象（如训练参数 argparse.Namespace）
+        return torch.load(model_path, map_location='cpu', mmap=mmap, weights_only=False)
+
+
 def load_weights_init(model, model_path):
-    ckpt = torch.load(model_path, weights_only=False)
+    ckpt = _load_checkpoint(model_path)
     model_dict = model.state_dict()
     pretrained_dict = ckpt['state_dict']
     matched_dict = {
         k: v
         for k, v in pretrained_dict.items()
-        if k in model_dict and model_dict[k].size() == v.size()
+        if k in model_dict and model_dict[k].shape == v.shape
     }
     missing_keys = [k for k in model_dict if k not in matched_dict]
     skipped_keys = [k for k in pretrained_dict if k not in matched_dict]
@@ -33,11 +46,10 @@ def load_weights_init(model, model_path):
     if not matched_dict:
         raise RuntimeError(f"权重文件与模型结构不匹配: {model_path}")
 
-    model_dict.update(matched_dict)
-    model.load_state_dict(model_dict, strict=False)
+    # 只加载匹配的参数，未匹配的参数保持原值
+    model.load_state_dict(matched_dict, strict=False)
     if "emotic" in model_path:
-        ckpt = torch.load(model_path, weights_only=False)
-        model.load_state_dict(ckpt['state_dict'])
+        model.load_state_dict(pretrained_dict)
 
     return {
         'matched_keys': len(matched_dict),
@@ -49,10 +61,52 @@ def load_weights_init(model, model_path):
 
 
 def weights_frozen(model):
-    for param in model.parameters():
-        param.requires_grad = False
+    model.requires_grad_(False)
 
 
 def weights_melted(model):
-    for param in model.parameters():
-        param.requires_grad = True
+    model.requires_grad_(True)
+
+
+@torch.no_grad()
+def fold_batchnorm1d(model):
+    """将 nn.Sequential 中与 Linear 相邻的 BatchNorm1d 折叠进 Linear（仅用于 eval 推理）
+
+    支持 Linear→BN 与 BN→Linear 两种顺序，被折叠的 BN 替换为 nn.Identity。
+    返回折叠的 BN 数量。
+    """
+    folded = 0
+    for seq in [m for m in model.modules() if isinstance(m, nn.Sequential)]:
+        names = list(seq._modules)
+        for prev_name, name in zip(names, names[1:]):
+            prev, cur = seq._modules[prev_name], seq._modules[name]
+            if isinstance(prev, nn.Linear) and _foldable(cur):
+                bn, linear, bn_name = cur, prev, name
+            elif _foldable(prev) and isinstance(cur, nn.Linear):
+                bn, linear, bn_name = prev, cur, prev_name
+            else:
+                continue
+            scale = (bn.running_var + bn.eps).rsqrt()
+            shift = -bn.running_mean * scale
+            if bn.affine:
+                shift = shift * bn.weight + bn.bias
+                scale = scale * bn.weight
+            bias = linear.bias if linear.bias is not None else torch.zeros(
+                linear.out_features, device=linear.weight.device
+            )
+            if linear is prev:
+                # y = s * (W x + b) + t
+                new_bias = bias * scale + shift
+                linear.weight.mul_(scale.unsqueeze(1))
+            else:
+                # y = W (s * x + t) + b
+                new_bias = linear.weight @ shift + bias
+                linear.weight.mul_(scale.unsqueeze(0))
+            linear.bias = nn.Parameter(new_bias, requires_grad=linear.weight.requires_grad)
+            seq._modules[bn_name] = nn.Identity()
+            folded += 1
+    return folded
+
+
+def _foldable(module):
+    return isinstance(module, nn.BatchNorm1d) and module.running_var is not None
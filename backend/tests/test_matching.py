@@ -0,0 +1,85 @@
+"""
+测试人脸-人体匹配
+"""
+import numpy as np
+
+from app.modules.detector.schemas import Detection, DetectionType
+from app.modules.recognizer.matching import (
+    match_faces_to_persons,
+    match_xyxy,
+    split_detections,
+)
+from app.schemas.common import BoundingBox
+
+
+class TestMatchXyxy:
+    """批量匹配函数测试"""
+
+    def test_prefers_person_containing_face_center(self):
+        """测试优先匹配包含人脸中心的人体框"""
+        faces = np.array([[40, 10, 60, 30]], dtype=np.float32)
+        persons = np.array(
+            [
+                [0, 0, 45, 100],  # IoU 较大但不包含人脸中心
+                [30, 0, 80, 200],  # 包含人脸中心
+            ],
+            dtype=np.float32,
+        )
+
+        assert match_xyxy(faces, persons).tolist() == [1]
+
+    def test_each_person_matched_once(self):
+        """测试每个人体最多匹配一个人脸"""
+        faces = np.array([[10, 10, 20, 20], [12, 12, 22, 22]], dtype=np.float32)
+        persons = np.array([[0, 0, 50, 100]], dtype=np.float32)
+
+        assert match_xyxy(faces, persons).tolist() == [0, -1]
+
+    def test_single_pair_falls_back_to_iou(self):
+        """测试单人场景人脸中心不在人体框内时按 IoU 阈值回退"""
+        faces = np.array([[40, 0, 100, 60]], dtype=np.float32)  # IoU = 0.2
+        persons = np.array([[0, 0, 60, 60]], dtype=np.float32)
+
+        assert match_xyxy(faces, persons, iou_threshold=0.1).tolist() == [0]
+        assert match_xyxy(faces, persons, iou_threshold=0.3).tolist() == [-1]
+
+    def test_empty_inputs(self):
+        """测试空输入"""
+        faces = np.zeros((2, 4), dtype=np.float32)
+        persons = np.zeros((0, 4), dtype=np.float32)
+
+        assert match_xyxy(faces, persons).tolist() == [-1, -1]
+
+
+class TestMatchFacesToPersons:
+    """检测对象匹配测试"""
+
+    @staticmethod
+    def _make(det_id, det_type, x, y, w, h):
+        return Detection(
+            id=det_id,
+            type=det_type,
+            bbox=BoundingBox(x=x, y=y, width=w, height=h),
+            confidence=0.9,
+        )
+
+    def test_mapping_uses_detection_ids(self):
+        """测试返回以检测ID为键的映射"""
+        faces = [
+            self._make(3, DetectionType.FACE, 10, 10, 10, 10),
+            self._make(4, DetectionType.FACE, 300, 300, 10, 10),
+        ]
+        persons = [self._make(7, DetectionType.PERSON, 0, 0, 50, 100)]
+
+        assert match_faces_to_persons(faces, persons) == {3: 7}
+
+    def test_split_detections(self):
+        """测试单次遍历拆分与 ID 索引"""
+        face = self._make(1, DetectionType.FACE, 10, 10, 10, 10)
+        person = self._make(2, DetectionType.PERSON, 0, 0, 50, 100)
+
+        faces, persons, by_id = split_detections([person, face])
+
+        assert faces == [face]
+        assert persons == [person]
+        assert by_id == {1: face, 2: person}
@@ -9,7 +9,9 @@ import numpy as np
 from pathlib import Path
 
 from app.core.pipeline import Pipeline
-from app.schemas.pipeline import PipelineConfig
+from app.core.source_manager import SourceManager
+from app.modules.visualizer.frame_renderer import FrameRenderer
+from app.schemas.pipeline import PipelineConfig, VisualizerConfig
 from app.modules.detector.schemas import Detection, DetectionType, BoundingBox
 from app.modules.recognizer.schemas import EmotionResult
 
@@ -35,4 +37,57 @@ class TestPipeline:
         pipeline = Pipeline(config)
         
         assert pipeline.state.value == "idle"
-        assert pipeline.config == config
\ No newline at end of file
+        assert pipeline.config == config
+
+
+class TestSourceManager:
+    """视觉源读帧测试"""
+
+    def _capture_manager(self, capture):
+        manager = SourceManager()
+        manager._capture = capture
+        manager._source_info = Mock(current_frame=0)
+        manager._read_frame = manager._read_frame_capture
+        return manager
+
+    def test_read_frame_keeps_preview_frame(self):
+        """测试读帧不替换预览帧，在读出的帧上原地绘制不影响预览"""
+        capture = Mock()
+        capture.isOpened.return_value = True
+        capture.read.return_value = (True, np.zeros((4, 4, 3), dtype=np.uint8))
+        manager = self._capture_manager(capture)
+        preview = np.zeros((4, 4, 3), dtype=np.uint8)
+        manager._current_frame = preview
+
+        ret, frame = manager.read_frame()
+        frame[:] = 255
+
+        assert ret
+        assert manager._current_frame is preview
+        assert not preview.any()
+        assert manager._source_info.current_frame == 1
+
+    def test_read_frame_from_closed_capture(self):
+        """测试视觉源已关闭时返回失败且不计帧"""
+        capture = Mock()
+        capture.isOpened.return_value = False
+        manager = self._capture_manager(capture)
+
+        assert manager.read_frame() == (False, None)
+        assert manager._source_info.current_frame == 0
+        capture.read.assert_not_called()
+
+
+class TestFrameRenderer:
+    """帧渲染器文本缓存测试"""
+
+    def test_font_change_refreshes_text_blend(self):
+        """测试字体大小变化后文本混合层与 bbox 尺寸一致"""
+        renderer = FrameRenderer(VisualizerConfig(font_scale=1.0))
+        renderer._text_blend("开心 87%", (0, 255, 0))
+
+        renderer.update_config(VisualizerConfig(font_scale=2.0))
+        left, top, right, bottom = renderer._text_bbox("开心 87%")
+        inv_alpha, _ = renderer._text_blend("开心 87%", (0, 255, 0))
+
+        assert inv_alpha.shape[:2] == (bottom - top, right - left)
@@ -0,0 +1,241 @@
+"""
+测试识别器基类的跨帧结果缓存、骨干网络编译、BN 折叠、caption 编码器量化与 ONNX 引擎导出
+"""
+import pytest
+import torch
+from torch import nn
+
+from app.modules.detector.schemas import Detection, DetectionType
+from app.modules.recognizer.base_recognizer import BaseEmotionRecognizer
+from app.modules.recognizer.schemas import EmotionResult
+from app.schemas.common import BoundingBox
+from app.schemas.pipeline import RecognizerConfig
+
+
+class _CountingRecognizer(BaseEmotionRecognizer):
+    """记录推理人脸数的测试识别器"""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.inferred: list[int] = []
+
+    def load_model(self, model_path=None):
+        pass
+
+    def predict(self, frame, detections):
+        faces = [d for d in detections if d.type == DetectionType.FACE]
+        return self._predict_with_cache(faces, self._infer)
+
+    def _infer(self, faces):
+        self.inferred.extend(face.id for face in faces)
+        return [
+            EmotionResult(
+                detection_id=face.id,
+                probabilities={"中性": 1.0},
+                dominant_emotion="中性",
+                confidence=1.0,
+            )
+            for face in faces
+        ]
+
+
+def _face(det_id, x, y):
+    return Detection(
+        id=det_id,
+        type=DetectionType.FACE,
+        bbox=BoundingBox(x=x, y=y, width=20, height=20),
+        confidence=0.9,
+    )
+
+
+class TestResultCache:
+    """跨帧结果缓存测试"""
+
+    def test_disabled_by_default(self):
+        """测试默认关闭时每帧都推理"""
+        recognizer = _CountingRecognizer(RecognizerConfig())
+        recognizer.predict(None, [_face(1, 10, 10)])
+        recognizer.predict(None, [_face(2, 10, 10)])
+
+        assert recognizer.inferred == [1, 2]
+
+    def test_reuses_result_for_still_face(self):
+        """测试框几乎未移动时复用结果并改写检测ID"""
+        recognizer = _CountingRecognizer(RecognizerConfig(result_cache_px=4))
+        recognizer.predict(None, [_face(1, 10, 10), _face(2, 100, 100)])
+        results = recognizer.predict(None, [_face(3, 12, 11), _face(4, 120, 100)])
+
+        assert recognizer.inferred == [1, 2, 4]
+        assert [r.detection_id for r in results] == [3, 4]
+
+    def test_refreshes_after_max_frames(self):
+        """测试结果连续复用达到上限后重新推理"""
+        recognizer = _CountingRecognizer(
+            RecognizerConfig(result_cache_px=4, result_cache_max_frames=2)
+        )
+        for det_id in range(1, 5):
+            recognizer.predict(None, [_face(det_id, 10, 10)])
+
+        assert recognizer.inferred == [1, 4]
+
+    def test_slow_drift_does_not_accumulate(self):
+        """测试按推理时的框比较，缓慢移动累计超过阈值后重新推理"""
+        recognizer = _CountingRecognizer(RecognizerConfig(result_cache_px=4))
+        for det_id, x in enumerate((10, 13, 16, 19), start=1):
+            recognizer.predict(None, [_face(det_id, x, 10)])
+
+        assert recognizer.inferred == [1, 3]
+
+    def test_reset_cache(self):
+        """测试清空缓存后重新推理"""
+        recognizer = _CountingRecognizer(RecognizerConfig(result_cache_px=4))
+        recognizer.predict(None, [_face(1, 10, 10)])
+        recognizer.reset_cache()
+        recognizer.predict(None, [_face(2, 10, 10)])
+
+        assert recognizer.inferred == [1, 2]
+
+
+class _FailingModule(nn.Module):
+    """模拟编译失败的模块"""
+
+    def forward(self, *args):
+        raise RuntimeError("compile failed")
+
+
+class _TwoStream(nn.Module):
+    """一个冻结骨干 + ModuleList 中一个冻结骨干与一个可训练层"""
+
+    def __init__(self):
+        super().__init__()
+        self.model_context = nn.Conv2d(3, 4, 3)
+        self.models = nn.ModuleList([nn.Conv2d(3, 4, 3), nn.Linear(8, 2)])
+        self.model_context.requires_grad_(False)
+        self.models[0].requires_grad_(False)
+
+    def forward(self, x):
+        a = self.model_context(x).mean((2, 3))
+        b = self.models[0](x).mean((2, 3))
+        return self.models[1](torch.cat([a, b], 1))
+
+
+class TestCompileBackbones:
+    """骨干网络编译测试"""
+
+    def test_compile_failure_restores_eager_modules(self, monkeypatch):
+        """测试预热时编译失败则还原为原模块"""
+        recognizer = _CountingRecognizer(RecognizerConfig(compile_backbones=True))
+        recognizer._model = _TwoStream().eval()
+        originals = (recognizer._model.model_context, recognizer._model.models[0])
+        monkeypatch.setattr(torch, "compile", lambda module, mode: _FailingModule())
+
+        recognizer._warmup(torch.zeros(1, 3, 8, 8))
+
+        assert recognizer._model.model_context is originals[0]
+        assert recognizer._model.models[0] is originals[1]
+
+    def test_only_frozen_children_compiled(self, monkeypatch):
+        """测试只替换参数全部冻结的子网络"""
+        recognizer = _CountingRecognizer(RecognizerConfig(compile_backbones=True))
+        recognizer._model = _TwoStream().eval()
+        monkeypatch.setattr(torch, "compile", lambda module, mode: _FailingModule())
+
+        replaced = recognizer._compile_backbones(torch.device("cpu"))
+
+        assert [name for _, name, _ in replaced] == ["model_context", "0"]
+        assert isinstance(recognizer._model.models[1], nn.Linear)
+
+
+class _WithCaption(nn.Module):
+    """带 caption 编码器的模型"""
+
+    def __init__(self):
+        super().__init__()
+        self.model_caption = nn.Sequential(nn.Flatten(), nn.Linear(12, 4))
+        self.fuse = nn.Linear(4, 2)
+        self.model_caption.requires_grad_(False)
+
+    @property
+    def caption_encoder(self):
+        return self.model_caption
+
+
+class TestQuantizeCaption:
+    """caption 编码器 INT8 量化测试"""
+
+    def test_quantizes_only_caption_encoder_on_cpu(self):
+        """测试只替换 caption 编码器中的 Linear 层"""
+        recognizer = _CountingRecognizer(RecognizerConfig(quantize_caption=True))
+        recognizer._model = _WithCaption().eval()
+
+        recognizer._prepare_model(torch.device("cpu"))
+
+        assert not isinstance(recognizer._model.model_caption[1], nn.Linear)
+        assert isinstance(recognizer._model.fuse, nn.Linear)
+        with torch.inference_mode():
+            output = recognizer._model.caption_encoder(torch.ones(1, 3, 2, 2))
+        assert output.shape == (1, 4)
+
+
+class TestFoldBatchNorm:
+    """BatchNorm1d 折叠测试"""
+
+    def test_folds_both_orders_without_changing_output(self):
+        """测试 Linear→BN 与 BN→Linear 折叠后输出不变"""
+        torch.manual_seed(0)
+        model = nn.Sequential(
+            nn.Linear(8, 6), nn.BatchNorm1d(6), nn.ReLU(),
+            nn.BatchNorm1d(6), nn.Linear(6, 2, bias=False),
+        )
+        for bn in (model[1], model[3]):
+            bn.running_mean.normal_()
+            bn.running_var.uniform_(0.5, 2.0)
+            bn.weight.data.normal_()
+            bn.bias.data.normal_()
+        recognizer = _CountingRecognizer(RecognizerConfig())
+        recognizer._model = model.eval()
+        x = torch.randn(4, 8)
+        with torch.no_grad():
+            expected = model(x)
+
+        recognizer._prepare_model(torch.device("cpu"))
+
+        assert not any(isinstance(m, nn.BatchNorm1d) for m in model.modules())
+        with torch.no_grad():
+            assert torch.allclose(model(x), expected, atol=1e-5)
+
+
+class _SingleOutput(nn.Module):
+    """只返回 logits 的模型（如 SDDENFPN）"""
+
+    def __init__(self):
+        super().__init__()
+        self.conv = nn.Conv2d(3, 4, 3)
+        self.fc = nn.Linear(4, 7)
+
+    def forward(self, x):
+        return self.fc(self.conv(x).mean((2, 3)))
+
+
+class TestExportEngine:
+    """ONNX 引擎导出测试"""
+
+    def test_exports_missing_engine_and_returns_tuple(self, tmp_path):
+        """测试引擎文件缺失时导出并切换，单输出模型返回 (logits, None)"""
+        pytest.importorskip("onnxruntime")
+        engine_path = tmp_path / "face.onnx"
+        recognizer = _CountingRecognizer(
+            RecognizerConfig(inference_backend="onnx", engine_path=str(engine_path))
+        )
+        recognizer.ENGINE_INPUT_NAMES = ("face",)
+        model = _SingleOutput().eval()
+        recognizer._model = model
+
+        recognizer._export_engine(torch.device("cpu"), torch.randn(2, 3, 16, 16))
+
+        assert engine_path.exists()
+        x = torch.randn(3, 3, 16, 16)
+        logits, attention = recognizer._model(x)
+        with torch.no_grad():
+            assert torch.allclose(logits, model(x), atol=1e-5)
+        assert attention is None
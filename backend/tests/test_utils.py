@@ -13,7 +13,7 @@ class TestFrameUtils:
     def test_encode_decode_cycle(self):
         """测试编码解码循环"""
         # 创建一个简单的测试图像
-        test_frame = np.ones((100, 100, 3), dtype=np.uint8) * 128  # 灰色图像
+        test_frame = np.full((100, 100, 3), 128, dtype=np.uint8)  # 灰色图像
         
         # 编码
         encoded = encode_frame_to_jpeg(test_frame, quality=80)
@@ -6,6 +6,9 @@
 
 import type { WSMessage, FrameMessage, FrameHeaderMessage } from '@/types';
 
+/** 二进制帧头部解码器 */
+const headerDecoder = new TextDecoder();
+
 type MessageHandler = (message: WSMessage) => void;
 type ConnectionHandler = (connected: boolean) => void;
 
@@ -26,9 +29,6 @@ class WebSocketService {
   private maxReconnectAttempts = 5;
   private reconnectDelay = 2000;
   
-  /** 等待二进制数据的帧头部 */
-  private pendingHeader: FrameHeaderMessage | null = null;
-  
   connect(): void {
     if (this.ws?.readyState === WebSocket.OPEN) {
       return;
@@ -40,6 +40,8 @@ class WebSocketService {
     
     try {
       this.ws = new WebSocket(url);
+      // 二进制帧需要同步解析长度前缀，直接以ArrayBuffer接收
+      this.ws.binaryType = 'arraybuffer';
       
       this.ws.onopen = () => {
         console.log('WebSocket 已连接');
@@ -47,44 +49,41 @@ class WebSocketService {
         this.notifyConnectionChange(true);
       };
       
-      this.ws.onmessage = async (event) => {
+      this.ws.onmessage = (event) => {
         try {
           if (typeof event.data === 'string') {
             // JSON消息
-            const message = JSON.parse(event.data) as WSMessage | FrameHeaderMessage;
+            this.notifyMessage(JSON.parse(event.data) as WSMessage);
+          } else if (event.data instanceof ArrayBuffer) {
+            // 二进制帧：[4字节大端头部长度][JSON头部][JPEG图像数据]
+            const buffer = event.data;
+            const headerLength = new DataView(buffer).getUint32(0);
+            const header = JSON.parse(
+              headerDecoder.decode(new Uint8Array(buffer, 4, headerLength))
+            ) as FrameHeaderMessage;
+            
+            // 保留原始Blob引用，用于历史记录存储
+            const imageBlob = new Blob(
+              [new Uint8Array(buffer, 4 + headerLength)],
+              { type: 'image/jpeg' }
+            );
+            
+            // 创建Object URL，避免Base64转换
+            const imageUrl = URL.createObjectURL(imageBlob);
+            
+            // 构建帧消息（包含Blob引用）
+            const frameMessage: FrameMessageWithBlob = {
+              type: 'frame',
+              timestamp: header.timestamp,
+              frame_id: header.frame_id,
+              image: imageUrl,
+              detections: header.detections,
+              emotions: header.emotions,
+              isObjectUrl: true,  // 标记为Object URL
+              imageBlob,  // 保留Blob引用
+            };
             
-            if (message.type === 'frame_header') {
-              // 保存头部，等待二进制数据
-              this.pendingHeader = message as FrameHeaderMessage;
-            } else {
-              this.notifyMessage(message as WSMessage);
-            }
-          } else if (event.data instanceof Blob) {
-            // 二进制图像数据
-            if (this.pendingHeader) {
-              const header = this.pendingHeader;
-              this.pendingHeader = null;
-              
-              // 保留原始Blob引用，用于历史记录存储
-              const imageBlob = event.data;
-              
-              // 创建Object URL，避免Base64转换
-              const imageUrl = URL.createObjectURL(imageBlob);
-              
-              // 构建帧消息（包含Blob引用）
-              const frameMessage: FrameMessageWithBlob = {
-                type: 'frame',
-                timestamp: header.timestamp,
-                frame_id: header.frame_id,
-                image: imageUrl,
-                detections: header.detections,
-                emotions: header.emotions,
-                isObjectUrl: true,  // 标记为Object URL
-                imageBlob,  // 保留Blob引用
-              };
-              
-              this.notifyMessage(frameMessage);
-            }
+            this.notifyMessage(frameMessage);
           }
         } catch (error) {
           console.error('解析WebSocket消息失败:', error);
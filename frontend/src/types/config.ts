@@ -2,6 +2,8 @@
 
 export type ModelSize = 'n' | 's' | 'm' | 'l' | 'x';
 export type RecognizerType = 'dden' | 'caer' | 'emotic' | 'mock';
+export type Precision = 'fp32' | 'fp16' | 'bf16';
+export type InferenceBackend = 'torch' | 'onnx' | 'tensorrt';
 
 export interface DetectorConfig {
   model_size: ModelSize;
@@ -12,6 +14,9 @@ export interface DetectorConfig {
   detect_person: boolean;
   max_detections: number;
   min_face_area_ratio: number;
+  // 仅决定导出 TensorRT 引擎时的最大 batch，检测仍逐帧进行
+  batch_size?: number;
+  use_tensorrt?: boolean;
 }
 
 export interface RecognizerConfig {
@@ -19,6 +24,16 @@ export interface RecognizerConfig {
   emotion_labels: string[];
   batch_size: number;
   recognizer_type: RecognizerType;
+  // 推理加速参数
+  inference_backend?: InferenceBackend;
+  engine_path?: string | null;
+  precision?: Precision;
+  channels_last?: boolean;
+  compile_backbones?: boolean;
+  quantize_caption?: boolean;
+  cuda_graph?: boolean;
+  result_cache_px?: number;
+  result_cache_max_frames?: number;
 }
 
 export interface VisualizerConfig {
@@ -39,6 +54,7 @@ export interface PerformanceConfig {
   skip_frames: number;
   async_inference: boolean;
   output_quality: number;
+  gpu_jpeg?: boolean;
   // 新增性能参数
   use_binary_ws?: boolean;
   inference_threads?: number;
@@ -64,12 +80,23 @@ export const DEFAULT_CONFIG: PipelineConfig = {
     detect_person: true,
     max_detections: 100,
     min_face_area_ratio: 0,
+    batch_size: 8,
+    use_tensorrt: false,
   },
   recognizer: {
     model_path: null,
     emotion_labels: ['开心', '悲伤', '愤怒', '恐惧', '惊讶', '厌恶', '中性'],
     batch_size: 8,
     recognizer_type: 'dden',
+    inference_backend: 'torch',
+    engine_path: null,
+    precision: 'fp32',
+    channels_last: false,
+    compile_backbones: false,
+    quantize_caption: false,
+    cuda_graph: false,
+    result_cache_px: 0,
+    result_cache_max_frames: 15,
   },
   visualizer: {
     show_bounding_box: true,
@@ -96,6 +123,7 @@ export const DEFAULT_CONFIG: PipelineConfig = {
     skip_frames: 0,
     async_inference: true,
     output_quality: 80,
+    gpu_jpeg: false,
     use_binary_ws: true,
     inference_threads: 2,
     frame_buffer_size: 2,
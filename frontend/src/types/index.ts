@@ -38,7 +38,7 @@ export interface FrameMessage {
   isObjectUrl?: boolean;
 }
 
-/** 二进制帧头部消息（用于二进制WebSocket传输） */
+/** 二进制帧头部（二进制帧消息中长度前缀之后的JSON部分） */
 export interface FrameHeaderMessage {
   type: 'frame_header';
   timestamp: number;